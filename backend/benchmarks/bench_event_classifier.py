@@ -0,0 +1,109 @@
+"""
+Microbenchmark: event classification on the chat streaming hot path.
+
+Feeds an ADK event stream through the previous hasattr-probing code from
+run_agent and through streaming.events.classify_event, checks that both
+extract the same agent and text for every event, and reports events/s.
+
+The stream is synthetic by default (a transfer, tool call and response, then
+many text chunks). Pass --events with a JSONL file of serialized ADK events
+(one Event.model_dump_json() per line) to replay a recorded stream instead.
+
+Usage: python benchmarks/bench_event_classifier.py [--events recorded.jsonl] [--repeat 200]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.events.event import Event
+from google.genai import types
+
+from streaming.events import classify_event
+
+
+def old_classify(event):
+    """The extraction logic previously inlined in run_agent"""
+    event_content = None
+    if hasattr(event, 'content'):
+        event_content = event.content
+
+    event_agent = None
+    if hasattr(event, 'agent'):
+        event_agent = event.agent
+    elif hasattr(event, 'agent_name'):
+        event_agent = event.agent_name
+    elif hasattr(event, 'metadata') and isinstance(event.metadata, dict):
+        event_agent = event.metadata.get('agent_name') or event.metadata.get('agent')
+    elif event_content and hasattr(event_content, 'parts') and event_content.parts:
+        for part in event_content.parts:
+            if hasattr(part, 'function_call') and part.function_call:
+                func_call = part.function_call
+                if hasattr(func_call, 'name') and func_call.name == 'transfer_to_agent':
+                    if hasattr(func_call, 'args') and isinstance(func_call.args, dict):
+                        event_agent = func_call.args.get('agent_name')
+                        break
+
+    content_text = None
+    if event_content and hasattr(event_content, 'parts') and event_content.parts:
+        text_parts = []
+        has_function_call = False
+        has_function_response = False
+        for part in event_content.parts:
+            if hasattr(part, 'text') and part.text:
+                text_parts.append(part.text)
+            elif hasattr(part, 'function_call'):
+                has_function_call = True
+            elif hasattr(part, 'function_response'):
+                has_function_response = True
+        if text_parts:
+            content_text = ''.join(text_parts)
+    return event_agent, content_text
+
+
+def synthetic_stream() -> list:
+    def event(author, *parts):
+        return Event(author=author, invocation_id="bench", content=types.Content(role="model", parts=list(parts)))
+
+    stream = [
+        event("Sam", types.Part(function_call=types.FunctionCall(name="transfer_to_agent", args={"agent_name": "Jenny"}))),
+        event("Jenny", types.Part(function_call=types.FunctionCall(name="search_flights", args={"origin": "JFK", "destination": "LHR"}))),
+        event("Jenny", types.Part(function_response=types.FunctionResponse(name="search_flights", response={"status": "search_required"}))),
+    ]
+    stream += [event("Jenny", types.Part(text=f"chunk {i} of the answer ")) for i in range(200)]
+    stream.append(Event(author="Jenny", invocation_id="bench"))
+    return stream
+
+
+def load_stream(path: str) -> list:
+    with open(path, 'r') as f:
+        return [Event.model_validate_json(line) for line in f if line.strip()]
+
+
+def time_path(fn, stream: list, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for event in stream:
+            fn(event)
+    return len(stream) * repeat / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", help="JSONL file of recorded ADK events")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    stream = load_stream(args.events) if args.events else synthetic_stream()
+    mismatches = sum(1 for e in stream if old_classify(e) != classify_event(e)[:2])
+    old_rate = time_path(old_classify, stream, args.repeat)
+    new_rate = time_path(classify_event, stream, args.repeat)
+    print(f"{len(stream)} events x {args.repeat}, mismatches={mismatches}")
+    print(f"old hasattr probes: {old_rate:12,.0f} events/s")
+    print(f"classify_event:     {new_rate:12,.0f} events/s ({new_rate / old_rate:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: making sure a chat session exists before each turn.
+
+Compares the previous get_session + create_session sequence with
+get_or_create_session on both session backends:
+- a burst of concurrent first messages for the same new session id, where
+  the old sequence races (several callers see no session and try to create
+  it) and get_or_create_session creates it exactly once
+- warm turns for existing sessions, reported as ensures/s and store lookups
+
+Usage: python benchmarks/bench_session_get_or_create.py [--burst 50] [--turns 2000]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.errors.already_exists_error import AlreadyExistsError
+
+from sessions.bounded import BoundedSessionService
+from sessions.sqlite import SqliteSessionService
+
+APP_NAME = "travel-planner"
+
+
+async def old_ensure(service, session_id: str) -> bool:
+    """The get-then-create sequence previously inlined in stream_agent_response"""
+    existing = await service.get_session(app_name=APP_NAME, user_id=session_id, session_id=session_id)
+    if existing is None:
+        await service.create_session(app_name=APP_NAME, user_id=session_id, session_id=session_id)
+        return True
+    return False
+
+
+async def new_ensure(service, session_id: str) -> bool:
+    return await service.get_or_create_session(app_name=APP_NAME, user_id=session_id, session_id=session_id)
+
+
+async def burst(ensure, service, size: int) -> tuple:
+    """Concurrent first messages for one new id: (creates, AlreadyExistsError failures)"""
+    results = await asyncio.gather(*(ensure(service, "burst") for _ in range(size)), return_exceptions=True)
+    failures = sum(isinstance(r, AlreadyExistsError) for r in results)
+    return sum(r is True for r in results), failures
+
+
+async def warm(ensure, service, turns: int, sessions: int = 20) -> float:
+    for i in range(sessions):
+        await ensure(service, f"warm-{i}")
+    started = time.perf_counter()
+    for turn in range(turns):
+        await ensure(service, f"warm-{turn % sessions}")
+    return turns / (time.perf_counter() - started)
+
+
+async def run(label: str, make_service, args):
+    for name, ensure in (("get + create", old_ensure), ("get_or_create", new_ensure)):
+        service = make_service()
+        creates, failures = await burst(ensure, service, args.burst)
+        rate = await warm(ensure, service, args.turns)
+        print(f"{label:7} {name:14} burst of {args.burst}: creates={creates:3} AlreadyExists={failures:3}  warm: {rate:10,.0f} ensures/s")
+        if name == "get_or_create":
+            print(f"        {'':14} {service.get_or_create_stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--burst", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        databases = iter(range(10))
+        asyncio.run(run("memory", BoundedSessionService, args))
+        asyncio.run(run("sqlite", lambda: SqliteSessionService(Path(tmp) / f"sessions{next(databases)}.db"), args))
+
+
+if __name__ == "__main__":
+    main()
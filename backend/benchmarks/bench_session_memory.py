@@ -0,0 +1,72 @@
+"""
+Memory check: chat session retention under a stream of new sessions.
+
+Simulates many short chats (one session per chat, a few turns of events
+each) against the stock InMemorySessionService and against
+sessions.bounded.BoundedSessionService, and reports traced heap usage and
+the bounded store's summary. The unbounded store grows with every chat; the
+bounded one levels off at its session limit.
+
+Usage: python benchmarks/bench_session_memory.py [--chats 5000] [--max-sessions 500]
+"""
+import os
+import sys
+import asyncio
+import argparse
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.events.event import Event
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from sessions.bounded import BoundedSessionService
+
+APP_NAME = "travel-planner"
+
+
+async def simulate(service, chats: int, turns: int) -> list:
+    """Run the chats and return traced heap size (MB) after every 10% of them"""
+    samples = []
+    for i in range(chats):
+        session_id = f"chat-{i}"
+        await service.create_session(app_name=APP_NAME, user_id=session_id, session_id=session_id)
+        for turn in range(turns):
+            session = await service.get_session(app_name=APP_NAME, user_id=session_id, session_id=session_id)
+            for author, text in (("user", f"question {turn}"), ("Jenny", "Here are some flights you might like. " * 20)):
+                event = Event(author=author, invocation_id=f"{session_id}-{turn}",
+                              content=types.Content(role="model" if author != "user" else "user", parts=[types.Part(text=text)]))
+                await service.append_event(session, event)
+        if (i + 1) % max(1, chats // 10) == 0:
+            samples.append(tracemalloc.get_traced_memory()[0] / 1e6)
+    return samples
+
+
+async def measure(service, chats: int, turns: int) -> list:
+    tracemalloc.start()
+    try:
+        return await simulate(service, chats, turns)
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=5000)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--max-sessions", type=int, default=500)
+    args = parser.parse_args()
+
+    unbounded = asyncio.run(measure(InMemorySessionService(), args.chats, args.turns))
+    service = BoundedSessionService(max_sessions=args.max_sessions)
+    bounded = asyncio.run(measure(service, args.chats, args.turns))
+
+    print(f"{args.chats} chats x {args.turns} turns, traced heap MB at each 10%:")
+    print("InMemorySessionService: " + " ".join(f"{mb:6.1f}" for mb in unbounded))
+    print("BoundedSessionService:  " + " ".join(f"{mb:6.1f}" for mb in bounded))
+    print(f"summary: {asyncio.run(service.summary())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: SSE frame encoding, pydantic ChatMessage versus streaming.encoder.
+
+Checks that SSEEncoder output is byte-identical to the previous
+f"data: {ChatMessage(...).model_dump_json()}\\n\\n" frames (UTF-8 encoded, as
+StreamingResponse sends them) for every frame type, including quotes,
+backslashes, control characters and non-ASCII text, then reports frames/s.
+
+Usage: python benchmarks/bench_sse_encoder.py [--frames 100000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import BaseModel
+
+from streaming.encoder import SSEEncoder
+from streaming.flush import Frame
+
+
+class ChatMessage(BaseModel):
+    """Same model as main.ChatMessage (main.py needs the agent stack to import)"""
+    type: str
+    data: dict
+
+
+def pydantic_encode(frame: Frame) -> bytes:
+    return f"data: {ChatMessage(type=frame.type, data=frame.data).model_dump_json()}\n\n".encode()
+
+
+def random_text(rng: random.Random) -> str:
+    alphabet = "abc XYZ 123 \"'\\/<>&\n\r\t\b\f\x00\x1f\x7f é ü 中文 ✈️ 🏨   "
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+
+
+def sample_frames(count: int) -> list:
+    rng = random.Random(7)
+    frames = []
+    for i in range(count):
+        kind = i % 20
+        if kind == 0:
+            frames.append(Frame("agent_transfer", {"agent": random_text(rng), "message": random_text(rng)}))
+        elif kind == 1:
+            frames.append(Frame("done", {"message": "Response complete"}))
+        elif kind == 2:
+            frames.append(Frame("error", {"message": random_text(rng), "detail": random_text(rng)}))
+        elif kind == 3:
+            frames.append(Frame("error", {"message": random_text(rng)}))
+        else:
+            frames.append(Frame("content", {"text": random_text(rng)}))
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=100_000)
+    args = parser.parse_args()
+
+    frames = sample_frames(args.frames)
+    encoder = SSEEncoder()
+    mismatches = sum(1 for f in frames if encoder.encode(f) != pydantic_encode(f))
+    batched = encoder.encode_batch(frames[:1000]) == b"".join(pydantic_encode(f) for f in frames[:1000])
+    print(f"{len(frames)} frames, mismatches={mismatches}, batch identical={batched}")
+
+    started = time.perf_counter()
+    for frame in frames:
+        pydantic_encode(frame)
+    old_rate = len(frames) / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for frame in frames:
+        encoder.encode(frame)
+    new_rate = len(frames) / (time.perf_counter() - started)
+
+    print(f"pydantic ChatMessage: {old_rate:12,.0f} frames/s")
+    print(f"SSEEncoder:           {new_rate:12,.0f} frames/s ({new_rate / old_rate:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
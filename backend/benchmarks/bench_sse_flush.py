@@ -0,0 +1,79 @@
+"""
+Benchmark: SSE flush policies versus the old fixed sleeps.
+
+A stub agent emits one transfer followed by token-sized content chunks at a
+fixed production rate. Each strategy is consumed by a client that takes a
+configurable time per write; the script reports time-to-first-byte, total
+stream duration, writes and content frames delivered.
+
+Usage: python benchmarks/bench_sse_flush.py [--chunks 500] [--produce-ms 1] [--client-ms 2]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streaming.flush import Frame, FlushPolicy
+
+
+def encode_one(frame: Frame) -> str:
+    return f"data: {frame.type} {frame.data}\n\n"
+
+
+def encode(frames: list) -> str:
+    return "".join(encode_one(frame) for frame in frames)
+
+
+async def agent_frames(chunks: int, produce: float):
+    yield Frame("agent_transfer", {"agent": "Jenny", "message": "Transferring you to Jenny..."})
+    for i in range(chunks):
+        await asyncio.sleep(produce)
+        yield Frame("content", {"text": f"token{i} "})
+    yield Frame("done", {"message": "Response complete"})
+
+
+async def old_stream(chunks: int, produce: float):
+    """The previous writer: one write per frame with fixed sleeps after each"""
+    async for frame in agent_frames(chunks, produce):
+        yield encode_one(frame)
+        if frame.type == "agent_transfer":
+            await asyncio.sleep(0.1)
+        elif frame.type == "content":
+            await asyncio.sleep(0.01)
+
+
+async def consume(stream, client: float) -> tuple:
+    started = time.perf_counter()
+    first, writes, frames = None, 0, 0
+    async for chunk in stream:
+        if first is None:
+            first = time.perf_counter() - started
+        writes += 1
+        frames += chunk.count("data: content")
+        await asyncio.sleep(client)
+    return first, time.perf_counter() - started, writes, frames
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--produce-ms", type=float, default=1.0)
+    parser.add_argument("--client-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    produce, client = args.produce_ms / 1000, args.client_ms / 1000
+
+    strategies = [("old sleeps", lambda: old_stream(args.chunks, produce))]
+    for policy in (FlushPolicy("immediate"), FlushPolicy("window", window=0.02), FlushPolicy("size", max_bytes=256)):
+        strategies.append((policy.mode, lambda p=policy: p.stream(agent_frames(args.chunks, produce), encode)))
+
+    print(f"{args.chunks} chunks, producer every {args.produce_ms}ms, client {args.client_ms}ms per write")
+    for label, make in strategies:
+        ttfb, total, writes, frames = await consume(make(), client)
+        print(f"{label:11s} ttfb={ttfb * 1000:7.2f}ms total={total * 1000:8.1f}ms writes={writes:4d} content_frames={frames:4d}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
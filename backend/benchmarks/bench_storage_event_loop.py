@@ -0,0 +1,130 @@
+"""
+Benchmark: chat stream inter-chunk latency while /api/cards/apply is under load.
+
+A synthetic SSE endpoint emits a chunk every few milliseconds from a local
+uvicorn server that shares its event loop with the auth and cards routers. The script measures the gaps between chunks
+with storage I/O run inline on the loop (the old behaviour) and offloaded to the
+storage thread pool, against a temporary copy of the JSON store padded with
+synthetic users so every write is realistically large.
+
+Usage: python benchmarks/bench_storage_event_loop.py [--users 5000] [--applies 200]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+import stub_agent
+import repositories.factory as factory
+import services.user_service as user_service
+import services.application_service as application_service
+from repositories.json_repository import JsonRepository
+from routers import auth, cards
+from services.auth_service import create_access_token
+
+CHUNK_INTERVAL = 0.005
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(auth.router)
+    app.include_router(cards.router)
+
+    @app.get("/bench/stream")
+    async def stream(chunks: int = 200):
+        async def generate():
+            for i in range(chunks):
+                yield f"data: {i}\n\n"
+                await asyncio.sleep(CHUNK_INTERVAL)
+        return StreamingResponse(generate(), media_type="text/event-stream")
+
+    return app
+
+
+async def measure(app: FastAPI, user_ids: list, applies: int) -> list:
+    """Return inter-chunk gaps (ms) of one stream while applies run concurrently"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+        async def apply(user_id: str):
+            token = create_access_token({"user_id": user_id})
+            await client.post(
+                "/api/cards/apply",
+                json={"cardSlug": "legionnaire"},
+                headers={"Authorization": f"Bearer {token}"}
+            )
+
+        async def read_stream() -> list:
+            gaps, last = [], None
+            async with client.stream("GET", "/bench/stream") as response:
+                async for _ in response.aiter_raw():
+                    now = time.perf_counter()
+                    if last is not None:
+                        gaps.append((now - last) * 1000)
+                    last = now
+            return gaps
+
+        stream_task = asyncio.create_task(read_stream())
+        await asyncio.gather(*(apply(user_id) for user_id in user_ids[:applies]))
+        gaps = await stream_task
+
+    server.should_exit = True
+    await server_task
+    return gaps
+
+
+async def run_inline(fn, *args, **kwargs):
+    """Old behaviour: storage I/O runs directly on the event loop"""
+    return fn(*args, **kwargs)
+
+
+def report(label: str, gaps: list):
+    gaps = sorted(gaps)
+    p = lambda q: gaps[min(len(gaps) - 1, int(q * len(gaps)))]
+    print(f"{label:10s} chunks={len(gaps) + 1:4d} mean={statistics.mean(gaps):7.2f}ms "
+          f"p50={p(0.5):7.2f}ms p99={p(0.99):7.2f}ms max={gaps[-1]:7.2f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--applies", type=int, default=200)
+    args = parser.parse_args()
+
+    app = build_app()
+    print(f"Ideal inter-chunk gap: {CHUNK_INTERVAL * 1000:.1f}ms")
+    for label, runner in (("inline", run_inline), ("offloaded", None)):
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp)
+            user_ids = stub_agent.build_store(directory, args.users)
+            factory._repository = JsonRepository(
+                directory / "users.json",
+                directory / "applications.json",
+                directory / "applications.ndjson"
+            )
+            original = user_service.run_storage
+            if runner:
+                user_service.run_storage = application_service.run_storage = runner
+            try:
+                report(label, await measure(app, user_ids, args.applies))
+            finally:
+                user_service.run_storage = application_service.run_storage = original
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
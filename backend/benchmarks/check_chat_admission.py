@@ -0,0 +1,81 @@
+"""
+Check: admission control and per-session ordering on /api/chat/stream.
+
+Runs the real app with a stub agent (benchmarks/stub_agent.py) on a local
+uvicorn server and verifies that:
+- a burst of distinct sessions never runs more than CHAT_MAX_ACTIVE turns at
+  once, and requests beyond the queue get 429 with a Retry-After header
+- turns double-submitted for one session never overlap and finish in the
+  order they were sent
+
+Usage: python benchmarks/check_chat_admission.py [--max-active 4] [--max-queue 8] [--burst 30]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+import stub_agent
+
+
+async def check(main, runner, args):
+    server, server_task, base_url = await stub_agent.serve(main.app)
+    peak = 0
+
+    async def watch():
+        nonlocal peak
+        while True:
+            peak = max(peak, runner.running)
+            await asyncio.sleep(0.001)
+
+    watcher = asyncio.create_task(watch())
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        async def turn(session_id: str):
+            response = await client.post("/api/chat/stream", json={"message": "hi", "session_id": session_id})
+            return response, time.perf_counter()
+
+        results = await asyncio.gather(*(turn(f"burst-{i}") for i in range(args.burst)))
+        codes = [r.status_code for r, _ in results]
+        retry_after = {r.headers.get("retry-after") for r, _ in results if r.status_code == 429}
+        print(f"burst of {args.burst}: 200={codes.count(200)} 429={codes.count(429)} "
+              f"Retry-After={sorted(retry_after)} peak running={peak} (limit {args.max_active})")
+
+        tasks = []
+        for _ in range(args.repeats):
+            tasks.append(asyncio.create_task(turn("double-submit")))
+            await asyncio.sleep(0.005)
+        finished = [done for _, done in await asyncio.gather(*tasks)]
+        print(f"{args.repeats} turns on one session: overlapping={runner.max_running_per_session['double-submit'] > 1} "
+              f"in order={finished == sorted(finished)}")
+        print(f"admission: {(await client.get('/api/admin/admission', headers=stub_agent.admin_headers())).json()}")
+
+    watcher.cancel()
+    server.should_exit = True
+    await server_task
+    return codes.count(429) > 0 and peak <= args.max_active and finished == sorted(finished)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-active", type=int, default=4)
+    parser.add_argument("--max-queue", type=int, default=8)
+    parser.add_argument("--burst", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    os.environ["CHAT_MAX_ACTIVE"] = str(args.max_active)
+    os.environ["CHAT_MAX_QUEUE"] = str(args.max_queue)
+
+    import main as chat_main
+    runner = stub_agent.install(chat_main, chunks=10, chunk_delay=0.01)
+    ok = asyncio.run(check(chat_main, runner, args))
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Check: a client that disconnects mid-stream cancels the agent run.
+
+Runs the real app with a slow stub agent (benchmarks/stub_agent.py) on a
+local uvicorn server. A client reads the first few SSE chunks of
+/api/chat/stream and closes the connection; the check then verifies that
+the stub run was cancelled once the resume grace period ran out rather than
+finished, that its admission slot was returned, and that the turn was
+recorded as client_aborted. A second client reads its stream to the end as
+a control.
+
+uvicorn reports ASGI spec 2.3, for which Starlette's own StreamingResponse
+listens for disconnects; servers reporting 2.4 or later do not get that, so
+--spec-version 2.4 rewrites the scope to check that path too.
+
+Usage: python benchmarks/check_client_disconnect.py [--chunks 200] [--read 3] [--grace 0.5] [--spec-version 2.4]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+import stub_agent
+
+
+def with_spec_version(app, version: str):
+    async def asgi(scope, receive, send):
+        if scope["type"] == "http":
+            scope = dict(scope, asgi=dict(scope.get("asgi", {}), spec_version=version))
+        await app(scope, receive, send)
+    return asgi
+
+
+async def check(main, runner, args) -> bool:
+    app = with_spec_version(main.app, args.spec_version) if args.spec_version else main.app
+    server, server_task, base_url = await stub_agent.serve(app)
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        started = time.perf_counter()
+        async with client.stream("POST", "/api/chat/stream", json={"message": "hi", "session_id": "leaver"}) as response:
+            read = 0
+            async for _ in response.aiter_raw():
+                read += 1
+                if read >= args.read:
+                    break
+        closed_at = time.perf_counter()
+
+        # Give the server the grace period plus a moment to notice the disconnect
+        while runner.running and time.perf_counter() - closed_at < args.grace + 2:
+            await asyncio.sleep(0.01)
+        stopped_after = time.perf_counter() - closed_at
+        full_run = args.chunks * args.chunk_ms / 1000
+        print(f"disconnected after {read} chunks ({(closed_at - started) * 1000:.0f}ms of a ~{full_run:.1f}s run); "
+              f"run stopped {stopped_after * 1000:.0f}ms later (grace {args.grace * 1000:.0f}ms)")
+
+        runner.chunks = 5
+        control = await client.post("/api/chat/stream", json={"message": "hi", "session_id": "stayer"})
+        summary = (await client.get("/api/admin/admission", headers=stub_agent.admin_headers())).json()
+
+    server.should_exit = True
+    await server_task
+    print(f"stub runs: started={runner.started} finished={runner.finished} cancelled={runner.cancelled} running={runner.running}")
+    print(f"control stream complete: {'Response complete' in control.text}")
+    print(f"admission: active={summary['active']} outcomes={summary['outcomes']}")
+    return (
+        runner.cancelled == 1 and runner.finished == 1 and runner.running == 0
+        and stopped_after < args.grace + 1
+        and summary["active"] == 0
+        and summary["outcomes"] == {"completed": 1, "error": 0, "client_aborted": 1}
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=200)
+    parser.add_argument("--chunk-ms", type=float, default=10.0)
+    parser.add_argument("--read", type=int, default=3)
+    parser.add_argument("--grace", type=float, default=0.5, help="SSE_RESUME_GRACE_SECONDS")
+    parser.add_argument("--spec-version", help="ASGI spec version to report to the app, e.g. 2.4")
+    args = parser.parse_args()
+    os.environ["SSE_RESUME_GRACE_SECONDS"] = str(args.grace)
+
+    import main as chat_main
+    runner = stub_agent.install(chat_main, chunks=args.chunks, chunk_delay=args.chunk_ms / 1000)
+    ok = asyncio.run(check(chat_main, runner, args))
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Check: /api/metrics exports chat latency and agent behaviour in Prometheus format.
+
+Runs the real app with a stub agent (benchmarks/stub_agent.py) on a local
+uvicorn server: flight questions transfer to Jenny, who calls two tools and
+one name no agent registers (as a model might invent), hotel questions
+transfer to an agent that does not exist, greetings are answered by Sam, and
+one message makes the agent fail. The
+check scrapes /api/metrics, validates every line against the text
+exposition format and compares the histograms and counters with what the
+turns did, and that the user store's group-commit counters are exported
+for the JSON backend. It also times the per-frame recording cost.
+
+Usage: python benchmarks/check_metrics.py [--turns 6] [--chunks 20]
+"""
+import os
+import re
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+import stub_agent
+
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="([^"\\]|\\.)*",?)*\})? (-?[0-9.]+(e[+-]?[0-9]+)?|\+Inf|NaN)$')
+
+
+def route(message: str) -> str:
+    if message == "boom":
+        raise RuntimeError("agent failed")
+    if "hotel" in message:
+        return "Concierge"
+    return "Jenny" if "flight" in message else "Sam"
+
+
+def parse(text: str) -> dict:
+    """sample name with labels -> value, after checking every line's syntax"""
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith("# HELP ") or line.startswith("# TYPE "):
+            continue
+        if not SAMPLE.match(line):
+            raise ValueError(f"Invalid exposition line: {line!r}")
+        name, value = line.rsplit(" ", 1)
+        samples[name] = float(value)
+    return samples
+
+
+async def check(main, runner, args) -> bool:
+    server, server_task, base_url = await stub_agent.serve(main.app)
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        messages = ["Find me a flight to Rome" if i % 2 else "Hello!" for i in range(args.turns)] + ["Book me a hotel", "boom"]
+        for i, message in enumerate(messages):
+            async with client.stream("POST", "/api/chat/stream", json={"message": message, "session_id": f"metrics-{i}"}) as response:
+                async for _ in response.aiter_raw():
+                    pass
+        response = await client.get("/api/metrics")
+    server.should_exit = True
+    await server_task
+
+    samples = parse(response.text)
+    flights = args.turns // 2
+    completed = args.turns + 1
+    expected = {
+        "chat_turn_duration_seconds_count": len(messages),
+        "chat_time_to_first_token_seconds_count": completed,
+        "chat_inter_chunk_gap_seconds_count": completed * (args.chunks - 1),
+        'chat_agent_transfers_total{source="Sam",destination="Jenny"}': flights,
+        # Unknown transfer targets share one series
+        'chat_agent_transfers_total{source="Sam",destination="other"}': 1,
+        'chat_agent_transfers_total{source="Sam",destination="Concierge"}': None,
+        # The stub calls both tools in every turn that reaches the agent, with or without a transfer
+        'chat_tool_calls_total{tool="search_flights"}': completed,
+        'chat_tool_calls_total{tool="compare_flight_prices"}': completed,
+        # Unregistered function names share one series
+        'chat_tool_calls_total{tool="other"}': completed,
+        'chat_tool_calls_total{tool="book_it_now"}': None,
+        'chat_errors_total{type="RuntimeError"}': 1,
+        'chat_turns_outcomes_total{kind="completed"}': completed,
+        'chat_turns_outcomes_total{kind="error"}': 1,
+        "chat_active_streams": 0,
+        "chat_admission_admitted_total": len(messages),
+    }
+    types = [line.split()[2] for line in response.text.splitlines() if line.startswith("# TYPE ")]
+    ok = len(types) == len(set(types))
+    print(f"{response.headers['content-type']}, {len(response.text.splitlines())} lines, {len(samples)} samples, all valid, metric names unique={ok}")
+    for name, value in expected.items():
+        match = samples.get(name) == value
+        ok = ok and match
+        print(f"  {'ok ' if match else 'BAD'} {name} = {samples.get(name)} (expected {value})")
+    ttft = samples["chat_time_to_first_token_seconds_sum"] / samples["chat_time_to_first_token_seconds_count"]
+    print(f"mean time to first token {ttft * 1000:.1f} ms, sessions exported: {samples.get('chat_sessions_sessions')}")
+    user_store = "storage_user_store_flush_count_total" in samples or os.getenv("STORAGE_BACKEND", "json") != "json"
+    ok = ok and user_store
+    print(f"  {'ok ' if user_store else 'BAD'} user store group commits exported: flushes={samples.get('storage_user_store_flush_count_total')}")
+
+    turn = main.chat_metrics.start_turn("Sam")
+    frame = main.Frame("content", {"text": "x"})
+    started = time.perf_counter()
+    for _ in range(100000):
+        turn.frame(frame)
+    print(f"recording cost: {(time.perf_counter() - started) * 10:.2f} us per content frame")
+    turn.finish()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--chunks", type=int, default=20)
+    args = parser.parse_args()
+
+    import main as chat_main
+    runner = stub_agent.install(chat_main, chunks=args.chunks, chunk_delay=0.005, route=route, tools=("search_flights", "compare_flight_prices", "book_it_now"))
+    ok = asyncio.run(check(chat_main, runner, args))
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Check: the agent pipeline records and replays model responses offline.
+
+Runs the real app and the real travel_planner agent tree (Runner, agent
+transfers, tool calls, SSE streaming) on a local uvicorn server, without
+network access. First every agent's model is a RecordingLlm wrapping a
+scripted model (Sam transfers to Luca, Luca calls
+get_restaurant_recommendations and then answers) and its tool responses are
+recorded, so one chat turn writes a recording. The cuisine has no close
+match, so the tool picks one at random. Then every agent's model is a
+ReplayLlm over that recording and tool calls are answered from it: the same
+message in new sessions must stream the same frames and store the same tool
+response, twice, without running the tool, with the configured per-token
+latency, and a message that was never recorded must end in an error frame.
+
+With network access, record real conversations instead by running the app
+or test_agent.py with MODEL_BACKEND=record, then replay them with
+MODEL_BACKEND=replay.
+
+Usage: python benchmarks/check_model_replay.py [--token-ms 2] [--first-token-ms 50]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from google.adk.models.base_llm import BaseLlm, LlmCapabilities
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+import stub_agent
+
+ANSWER = (
+    "Ciao, I'm Luca! Rome is wonderful for Italian food. Start with cacio e pepe at a classic "
+    "trattoria in Trastevere, try supplì from a friggitoria near Campo de' Fiori, and book a table "
+    "at a Testaccio restaurant for carbonara and coda alla vaccinara. "
+) * 3
+
+SCRIPT = {
+    "Sam": [types.Part(function_call=types.FunctionCall(name="transfer_to_agent", args={"agent_name": "Luca"}))],
+    "Luca": [
+        types.Part(function_call=types.FunctionCall(name="get_restaurant_recommendations", args={"destination": "Rome", "cuisine_type": "street food"})),
+        types.Part(text=ANSWER),
+    ],
+}
+
+
+class ScriptedLlm(BaseLlm):
+    """Stands in for the live model while recording: each agent's scripted parts, one per call"""
+
+    agent_name: str
+    calls: int = 0
+
+    @property
+    def capabilities(self) -> LlmCapabilities:
+        return LlmCapabilities(output_schema_and_tools=True)
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        script = SCRIPT[self.agent_name]
+        part = script[min(self.calls, len(script) - 1)]
+        self.calls += 1
+        yield LlmResponse(content=types.Content(role="model", parts=[part]))
+
+
+def agents(root):
+    yield root
+    for sub_agent in root.sub_agents:
+        yield from agents(sub_agent)
+
+
+async def tool_responses(main, session_id: str) -> list:
+    """Function responses stored in a session, except agent transfers"""
+    session = await main.session_service.get_session(app_name="travel-planner", user_id=session_id, session_id=session_id)
+    return [
+        part.function_response.response
+        for event in session.events for part in (event.content.parts if event.content else None) or []
+        if part.function_response is not None and part.function_response.name != "transfer_to_agent"
+    ]
+
+
+async def chat(client, message: str, session_id: str):
+    """Frames (type, payload) of one turn and its duration in ms"""
+    started = time.perf_counter()
+    frames = []
+    async with client.stream("POST", "/api/chat/stream", json={"message": message, "session_id": session_id}) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("data: "):
+                frame = json.loads(line[6:])
+                frames.append((frame["type"], frame["data"].get("text") or frame["data"].get("agent") or frame["data"].get("message")))
+    return frames, (time.perf_counter() - started) * 1000
+
+
+async def check(main, args) -> bool:
+    from travel_planner.agent import root_agent
+    from travel_planner.model_backend import (
+        ModelRecording, RecordingLlm, ReplayLlm, TOKEN_PATTERN, record_tool_callback, replay_tool_callback
+    )
+    from travel_planner.tools import luca
+
+    path = os.path.join(tempfile.mkdtemp(), "model_calls.jsonl")
+    message = "Where should I eat Italian food in Rome?"
+    server, server_task, base_url = await stub_agent.serve(main.app)
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        recording = ModelRecording(path)
+        for agent in agents(root_agent):
+            agent.model = RecordingLlm(model="scripted", agent_name=agent.name, inner=ScriptedLlm(model="scripted", agent_name=agent.name), recording=recording)
+            agent.after_tool_callback = record_tool_callback(agent.name, recording)
+        recorded, _ = await chat(client, message, "record")
+        recorded_tools = await tool_responses(main, "record")
+        print(f"recorded run: {len(recorded)} frames, recording {ModelRecording(path).stats()}")
+
+        replay = ModelRecording(path)
+        for agent in agents(root_agent):
+            agent.model = ReplayLlm(model="replay", agent_name=agent.name, recording=replay,
+                                    token_delay=args.token_ms / 1000, first_token_delay=args.first_token_ms / 1000)
+            agent.after_tool_callback = None
+            agent.before_tool_callback = replay_tool_callback(agent.name, replay)
+        # A tool that ran again would normalize its cuisine
+        normalized = []
+        normalize_cuisine_type = luca.normalize_cuisine_type
+        luca.normalize_cuisine_type = lambda cuisine: normalized.append(cuisine) or normalize_cuisine_type(cuisine)
+        replayed, replay_ms = await chat(client, message, "replay-1")
+        replay.rewind()
+        again, _ = await chat(client, message, "replay-2")
+        replayed_tools = await tool_responses(main, "replay-1") + await tool_responses(main, "replay-2")
+        tool_ran = bool(normalized)
+        luca.normalize_cuisine_type = normalize_cuisine_type
+        missed, _ = await chat(client, "Something nobody recorded", "replay-3")
+    server.should_exit = True
+    await server_task
+
+    tokens = len(TOKEN_PATTERN.findall(ANSWER)) + 2  # answer text plus two function calls
+    expected_ms = 3 * args.first_token_ms + tokens * args.token_ms
+    print(f"replayed run: {len(replayed)} frames in {replay_ms:.1f} ms (model latency {expected_ms:.0f} ms: 3 calls, {tokens} tokens)")
+    for frame_type, payload in replayed:
+        print(f"  {frame_type:15} {str(payload)[:70]}")
+    print(f"replay matches recording={replayed == recorded} deterministic={again == replayed}")
+    tools_match = len(recorded_tools) == 1 and replayed_tools == recorded_tools * 2
+    print(f"tool response replayed from recording={tools_match} tool ran during replay={tool_ran} "
+          f"(recorded cuisine: {recorded_tools[0]['search_criteria']['cuisine_type'] if recorded_tools else None})")
+    print(f"unrecorded message ends with: {missed[-1][0]} ({str(missed[-1][1])[:70]})")
+    return (
+        replayed == recorded and again == replayed and tools_match and not tool_ran
+        and ("content", ANSWER) in [(t, p) for t, p in recorded]
+        and [t for t, _ in recorded].count("agent_transfer") == 1
+        and missed[-1][0] == "error" and replay_ms >= expected_ms
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--token-ms", type=float, default=2.0)
+    parser.add_argument("--first-token-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    import main as chat_main
+    ok = asyncio.run(check(chat_main, args))
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Check: batch pre-qualification matches the scalar underwriting path.
+
+Generates applicants clustered around every card threshold (salary, net
+worth, FICO and the birthday that crosses a minimum age), plus records the
+scalar path would reject: fractional, out-of-range and non-numeric credit
+scores, and missing fields. For each record the expected outcome comes from
+the scalar code: a User-validated credit score, then
+application_service.calculate_age and calculate_approval_tier per card.
+
+The records are scored by services/underwriting.prequalify_ndjson and sent
+through POST /api/cards/prequalify/batch on a local uvicorn server with a
+small batch size, which must stream its results in several chunks and
+return the same lines.
+
+Usage: python benchmarks/check_prequalify_batch.py [--records 20000] [--batch-lines 1000]
+"""
+import os
+import sys
+import json
+import random
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI
+from pydantic import ValidationError
+
+import stub_agent
+import routers.cards as cards
+from data.cardData import CARD_THRESHOLDS
+from models.user import User, UserResponse
+from routers.auth import get_current_user
+from services.application_service import calculate_age, calculate_approval_tier
+from services.underwriting import prequalify_ndjson
+
+
+def near(rng: random.Random, values: list, spread: float) -> float:
+    return rng.choice(values) + rng.choice([-spread, 0, spread, rng.uniform(-10 * spread, 10 * spread)])
+
+
+def make_records(rng: random.Random, count: int) -> list:
+    levels = [level for card in CARD_THRESHOLDS.values() for level in card.values()]
+    today = datetime.utcnow()
+    records = []
+    for i in range(count):
+        age = int(near(rng, [level["minAge"] for level in levels], 1))
+        # Birthdays on either side of today, where calculate_age changes
+        birth = today.replace(year=today.year - age) + timedelta(days=rng.choice([-1, 0, 1, rng.randint(-200, 200)]))
+        record = {
+            "id": f"applicant-{i}",
+            "salary": round(near(rng, [level["minSalary"] for level in levels], 1), 2),
+            "netWorth": round(near(rng, [level["minNetWorth"] for level in levels], 1), 2),
+            "creditScore": int(near(rng, [level["minFico"] for level in levels], 1)),
+            "birthDate": birth.strftime("%Y-%m-%d"),
+        }
+        kind = rng.random()
+        if kind < 0.05:
+            record["creditScore"] += 0.5
+        elif kind < 0.08:
+            record["creditScore"] = rng.choice([299, 851, "abc", None])
+        elif kind < 0.10:
+            record["creditScore"] = float(record["creditScore"])
+        elif kind < 0.12:
+            record["creditScore"] = str(record["creditScore"])
+        elif kind < 0.13:
+            del record["salary"]
+        records.append(record)
+    return records
+
+
+def scalar(record: dict) -> dict:
+    """Expected output line, from the scalar underwriting code"""
+    try:
+        # Validated exactly as assigning it to a stored User
+        user = User.__pydantic_validator__.validate_assignment(User.model_construct(), "creditScore", record["creditScore"])
+        score, salary, net_worth = user.creditScore, float(record["salary"]), float(record["netWorth"])
+    except (ValidationError, KeyError):
+        return {"error": True}
+    age = calculate_age(record["birthDate"])
+    return {"id": record["id"], "tiers": {
+        slug: calculate_approval_tier(salary, net_worth, score, age, slug) for slug in CARD_THRESHOLDS
+    }}
+
+
+def compare(expected: list, lines: list) -> int:
+    mismatches = 0
+    for want, line in zip(expected, lines):
+        got = json.loads(line)
+        if want.get("error") and "error" in got:
+            continue
+        if want != got:
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"  mismatch: expected {want}, got {got}")
+    return mismatches + abs(len(expected) - len(lines))
+
+
+async def post_batch(body: bytes, batch_lines: int) -> tuple:
+    """Lines returned by the endpoint and the number of response body messages the app sent"""
+    cards.PREQUALIFY_BATCH_LINES = batch_lines
+    app = FastAPI()
+    app.include_router(cards.router)
+    app.dependency_overrides[get_current_user] = lambda: UserResponse.model_construct(id="check")
+    chunks = 0
+
+    async def counting_app(scope, receive, send):
+        async def counting_send(message):
+            nonlocal chunks
+            chunks += message["type"] == "http.response.body" and bool(message.get("body"))
+            await send(message)
+        await app(scope, receive, counting_send)
+
+    server, server_task, base_url = await stub_agent.serve(counting_app)
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        response = await client.post("/api/cards/prequalify/batch", content=body)
+    server.should_exit = True
+    await server_task
+    return response.text.splitlines(), chunks
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--batch-lines", type=int, default=1000)
+    args = parser.parse_args()
+
+    records = make_records(random.Random(11), args.records)
+    expected = [scalar(record) for record in records]
+    body = b"".join(json.dumps(record).encode() + b"\n" for record in records)
+
+    vector = prequalify_ndjson(body.split(b"\n")).decode().splitlines()
+    streamed, chunks = asyncio.run(post_batch(body, args.batch_lines))
+    errors = sum(1 for e in expected if e.get("error"))
+    print(f"{len(records)} records, {errors} rejected by the scalar path")
+    vector_mismatches = compare(expected, vector)
+    print(f"prequalify_ndjson vs scalar: {vector_mismatches} mismatches")
+    endpoint_mismatches = compare(expected, streamed)
+    print(f"endpoint vs scalar: {endpoint_mismatches} mismatches, streamed in {chunks} chunks (batches of {args.batch_lines} lines)")
+    ok = vector_mismatches == 0 and endpoint_mismatches == 0 and chunks > 1
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
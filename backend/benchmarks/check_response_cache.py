@@ -0,0 +1,90 @@
+"""
+Check: identical first messages are answered from the first-turn response cache.
+
+Runs the real app with CHAT_RESPONSE_CACHE=1 and a stub agent
+(benchmarks/stub_agent.py) on a local uvicorn server. Two new chats open
+with the same message spelled differently; the check verifies that the
+agent ran only for the first, that the second received the same text and
+transfers, that its session history records the turn like an agent run
+does (same authors, transfer included), and that its follow-up message,
+no longer a first turn, runs the agent. It prints the duration of a missed
+and a cached first turn.
+
+Usage: python benchmarks/check_response_cache.py [--chunks 50] [--chunk-delay 0.01]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+import stub_agent
+
+
+async def chat(client, message: str, session_id: str):
+    """Collected frames of one turn, its text, and its duration in ms"""
+    started = time.perf_counter()
+    frames = []
+    async with client.stream("POST", "/api/chat/stream", json={"message": message, "session_id": session_id}) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("data: "):
+                frames.append(json.loads(line[6:]))
+    elapsed = (time.perf_counter() - started) * 1000
+    text = "".join(frame["data"]["text"] for frame in frames if frame["type"] == "content")
+    transfers = [frame["data"]["agent"] for frame in frames if frame["type"] == "agent_transfer"]
+    return frames, text, transfers, elapsed
+
+
+async def history(main, session_id: str) -> list:
+    session = await main.session_service.get_session(app_name="travel-planner", user_id=session_id, session_id=session_id)
+    return [event.author for event in session.events]
+
+
+async def check(main, runner) -> bool:
+    server, server_task, base_url = await stub_agent.serve(main.app)
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        _, text_a, transfers_a, missed_ms = await chat(client, "Plan a trip to Paris", "chat-a")
+        frames_b, text_b, transfers_b, cached_ms = await chat(client, "  plan a trip to paris!", "chat-b")
+        runs_after_first_turns = runner.started
+        history_a, history_b = await history(main, "chat-a"), await history(main, "chat-b")
+        await chat(client, "Plan a trip to Paris", "chat-b")
+        runs_after_follow_up = runner.started
+        stats = (await client.get("/api/admin/response-cache", headers=stub_agent.admin_headers())).json()
+    server.should_exit = True
+    await server_task
+
+    print(f"first turn, agent ran: {missed_ms:8.1f} ms")
+    print(f"first turn, cached:    {cached_ms:8.1f} ms ({len(frames_b)} frames)")
+    print(f"agent runs after two first turns={runs_after_first_turns}, after follow-up={runs_after_follow_up}")
+    print(f"same text={text_a == text_b} same transfers={transfers_a == transfers_b}")
+    print(f"history authors match={history_a == history_b} ({len(history_b)} events, ends with {history_b[-1] if history_b else None})")
+    print(f"cache: {stats}")
+    return (
+        runs_after_first_turns == 1 and runs_after_follow_up == 2
+        and text_a == text_b and transfers_a == transfers_b
+        and history_a == history_b and history_b[0] == "user"
+        and stats["hits"] == 1 and stats["stores"] == 1
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=50)
+    parser.add_argument("--chunk-delay", type=float, default=0.01)
+    args = parser.parse_args()
+    os.environ["CHAT_RESPONSE_CACHE"] = "1"
+
+    import main as chat_main
+    runner = stub_agent.install(chat_main, chunks=args.chunks, chunk_delay=args.chunk_delay)
+    ok = asyncio.run(check(chat_main, runner))
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Check: a dropped chat stream resumes with Last-Event-ID, without a new run.
+
+Runs the real app with a stub agent (benchmarks/stub_agent.py) on a local
+uvicorn server. A client reads part of /api/chat/stream, noting the last
+SSE id it saw, and drops the connection; after a pause it reconnects to
+/api/chat/stream/{session_id} with that Last-Event-ID. The check verifies
+that the two parts join into exactly the frames of one uninterrupted
+stream, with no frame missing or repeated, and that the agent ran once.
+It also checks the 400/404/410 answers of the resume endpoint, and that a
+follower that falls further behind than the replay buffer ends with a
+`replay_gap` error frame instead of a silently truncated stream.
+
+Usage: python benchmarks/check_stream_resume.py [--chunks 100] [--read 20] [--pause 0.3]
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+import stub_agent
+
+
+def parse_events(lines: list) -> list:
+    """(id, data) for every complete SSE event in the given lines"""
+    events, event_id, data = [], None, None
+    for line in lines:
+        if line.startswith("id: "):
+            event_id = int(line[4:])
+        elif line.startswith("data: "):
+            data = line[6:]
+        elif line == "" and data is not None:
+            events.append((event_id, data))
+            event_id, data = None, None
+    return events
+
+
+async def read_events(response, limit: int = None) -> list:
+    lines = []
+    async for line in response.aiter_lines():
+        lines.append(line)
+        if limit is not None and line == "" and len(parse_events(lines)) >= limit:
+            break
+    return parse_events(lines)
+
+
+async def lagging_follower(main) -> list:
+    """Frames seen by a follower that stalls while a turn overruns a 4-frame buffer"""
+    from streaming.turns import ChatTurns
+
+    async def frames():
+        for i in range(20):
+            yield main.Frame("content", {"text": f"{i} "})
+            await asyncio.sleep(0)
+
+    turns = ChatTurns(buffer_frames=4, grace=1)
+    lease = await main.chat_admission.acquire("lagging")
+    turn = turns.start("lagging", frames(), lease, main.flush_policy, main.sse_encoder.encode_event)
+    follower = turn.follow(turn.first_id - 1)
+    chunks = [await follower.__anext__()]
+    await turn.task
+    chunks += [chunk async for chunk in follower]
+    return parse_events(b"".join(chunks).decode().split("\n"))
+
+
+async def check(main, runner, args) -> bool:
+    server, server_task, base_url = await stub_agent.serve(main.app)
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        # Reference: one uninterrupted turn
+        async with client.stream("POST", "/api/chat/stream", json={"message": "hi", "session_id": "steady"}) as response:
+            reference = await read_events(response)
+
+        async with client.stream("POST", "/api/chat/stream", json={"message": "hi", "session_id": "flaky"}) as response:
+            first = await read_events(response, limit=args.read)
+        last_id = first[-1][0]
+        await asyncio.sleep(args.pause)
+        async with client.stream("GET", "/api/chat/stream/flaky", headers={"Last-Event-ID": str(last_id)}) as response:
+            status = response.status_code
+            rest = await read_events(response)
+
+        ids = [event_id for event_id, _ in first + rest]
+        joined = [data for _, data in first + rest]
+        expected = [data for _, data in reference]
+        print(f"read {len(first)} frames (last id {last_id}), paused {args.pause}s, resume {status}: {len(rest)} more frames")
+        print(f"ids contiguous={ids == list(range(ids[0], ids[0] + len(ids)))} frames match one stream={joined == expected}")
+        print(f"stub runs: started={runner.started} finished={runner.finished} cancelled={runner.cancelled}")
+
+        codes = {
+            "bad id": (await client.get("/api/chat/stream/flaky", headers={"Last-Event-ID": "x"})).status_code,
+            "unknown session": (await client.get("/api/chat/stream/nobody")).status_code,
+        }
+        main.chat_turns._buffers["flaky"]._frames.popleft()
+        codes["dropped frames"] = (await client.get("/api/chat/stream/flaky", headers={"Last-Event-ID": "0"})).status_code
+        print(f"resume errors: {codes}")
+        turns = (await client.get("/api/admin/admission", headers=stub_agent.admin_headers())).json()["turns"]
+        print(f"turns: {turns}")
+
+    lagging = await lagging_follower(main)
+    last = json.loads(lagging[-1][1])
+    gap_reported = last["type"] == "error" and last["data"]["code"] == "replay_gap"
+    print(f"lagging follower: {len(lagging)} frames, last {last}")
+
+    server.should_exit = True
+    await server_task
+    return (
+        status == 200 and joined == expected and ids == list(range(ids[0], ids[0] + len(ids)))
+        and runner.started == 2 and runner.finished == 2
+        and codes == {"bad id": 400, "unknown session": 404, "dropped frames": 410}
+        and gap_reported
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=100)
+    parser.add_argument("--read", type=int, default=20)
+    parser.add_argument("--pause", type=float, default=0.3)
+    args = parser.parse_args()
+    os.environ.setdefault("SSE_RESUME_GRACE_SECONDS", "5")
+
+    import main as chat_main
+    runner = stub_agent.install(chat_main, chunks=args.chunks, chunk_delay=0.01)
+    ok = asyncio.run(check(chat_main, runner, args))
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Load test: concurrent chat streams against /api/chat/stream.
+
+Opens `--sessions` concurrent chats, each sending a scripted multi-turn
+conversation (one turn after the other, like a user reading replies), and
+measures every turn from the client side:
+- time to first byte of the response body
+- gaps between consecutive body chunks (inter-frame gaps)
+- frames received, agent transfers and their target agents
+- 429 rejections, non-200 answers, error frames and transport errors
+
+The agent is the stub runner from benchmarks/stub_agent.py, routed by
+keywords so different turns transfer to different specialists, which makes
+results reproducible without network access. `--transport asgi` drives the
+ASGI app in-process and timestamps each body chunk as the app sends it;
+`--transport http` runs uvicorn on localhost and reads over real sockets.
+
+Usage: python benchmarks/load_chat_streams.py [--sessions 50] [--turns 4] [--chunks 40]
+           [--chunk-delay 0.01] [--transport asgi|http] [--max-active 8] [--max-queue 32]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from collections import Counter
+from typing import AsyncIterator, List, NamedTuple, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+import stub_agent
+
+CONVERSATION = [
+    "Hi! I'm planning a trip to Rome in the spring",
+    "Can you find flights from New York?",
+    "I also need a hotel near the Colosseum",
+    "Where should we eat on the first night?",
+    "What would the whole trip cost?",
+    "Thanks, that's all for now",
+]
+
+ROUTES = (("flight", "Jenny"), ("hotel", "Marcus"), ("eat", "Luca"), ("cost", "Alex"), ("trip", "Sofia"))
+
+
+def route(message: str) -> str:
+    """Specialist the stub transfers to for a message; Sam answers anything else himself"""
+    message = message.lower()
+    return next((agent for keyword, agent in ROUTES if keyword in message), "Sam")
+
+
+class TurnResult(NamedTuple):
+    status: int
+    ttfb: float
+    duration: float
+    gaps: List[float]
+    frames: int
+    transfers: List[str]
+    error: Optional[str]
+
+
+async def asgi_stream(app, path: str, payload: dict) -> Tuple[int, AsyncIterator[bytes]]:
+    """POST to the ASGI app in-process; the status and the body chunks as the app sends them"""
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80),
+        "headers": [(b"host", b"localhost"), (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    }
+    messages: asyncio.Queue = asyncio.Queue()
+    finished = asyncio.Event()
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def run():
+        try:
+            await app(scope, receive, messages.put)
+        finally:
+            await messages.put(None)
+
+    task = asyncio.create_task(run())
+    start = await messages.get()
+    if start is None:
+        await task
+        raise RuntimeError("The app closed without a response")
+
+    async def chunks():
+        try:
+            while True:
+                message = await messages.get()
+                if message is None:
+                    return
+                if message.get("body"):
+                    yield message["body"]
+                if not message.get("more_body", False):
+                    return
+        finally:
+            finished.set()
+            await task
+
+    return start["status"], chunks()
+
+
+async def run_turn(open_stream, message: str, session_id: str) -> TurnResult:
+    started = time.perf_counter()
+    first = last = None
+    gaps, transfers, frames, error, buffer = [], [], 0, None, b""
+    try:
+        status, body = await open_stream(message, session_id)
+        async for chunk in body:
+            now = time.perf_counter()
+            if first is None:
+                first = now
+            else:
+                gaps.append(now - last)
+            last = now
+            buffer += chunk
+            *events, buffer = buffer.split(b"\n\n")
+            for event in events:
+                for line in event.split(b"\n"):
+                    if line.startswith(b"data: "):
+                        frame = json.loads(line[6:])
+                        frames += 1
+                        if frame["type"] == "agent_transfer":
+                            transfers.append(frame["data"]["agent"])
+                        elif frame["type"] == "error":
+                            error = frame["data"]["message"]
+    except Exception as e:
+        status, error = 0, f"{type(e).__name__}: {e}"
+    if status != 200 and error is None:
+        error = f"HTTP {status}"
+    end = time.perf_counter()
+    return TurnResult(status, (first or end) - started, end - started, gaps, frames, transfers, error)
+
+
+async def run_session(open_stream, session_id: str, turns: int, think_time: float) -> List[TurnResult]:
+    results = []
+    for turn in range(turns):
+        results.append(await run_turn(open_stream, CONVERSATION[turn % len(CONVERSATION)], session_id))
+        await asyncio.sleep(think_time)
+    return results
+
+
+def percentiles(values: List[float]) -> str:
+    if not values:
+        return "-"
+    values = sorted(values)
+    pick = lambda p: values[min(len(values) - 1, int(p * len(values)))] * 1000
+    return f"p50 {pick(0.5):8.2f}  p90 {pick(0.9):8.2f}  p99 {pick(0.99):8.2f}  max {values[-1] * 1000:8.2f} ms"
+
+
+def report(results: List[TurnResult], wall: float, runner):
+    ok = [r for r in results if r.status == 200 and r.error is None]
+    rejected = [r for r in results if r.status == 429]
+    failed = [r for r in results if r.error is not None and r.status != 429]
+    frames = sum(r.frames for r in results)
+    transfers = Counter(agent for r in results for agent in r.transfers)
+    print(f"turns: {len(results)} in {wall:.2f}s ({len(results) / wall:.1f} turns/s), "
+          f"ok {len(ok)}, rejected 429 {len(rejected)}, errors {len(failed)} (error rate {len(failed) / len(results):.1%})")
+    print(f"time to first byte  {percentiles([r.ttfb for r in ok])}")
+    print(f"inter-frame gap     {percentiles([g for r in ok for g in r.gaps])}")
+    print(f"turn duration       {percentiles([r.duration for r in ok])}")
+    print(f"frames: {frames} ({frames / wall:.0f} frames/s), transfers: {sum(transfers.values())} {dict(transfers)}")
+    if failed:
+        print(f"errors: {dict(Counter(r.error for r in failed).most_common(5))}")
+    print(f"stub runs: started={runner.started} finished={runner.finished} cancelled={runner.cancelled}")
+
+
+async def load(main, runner, args):
+    server = None
+    if args.transport == "asgi":
+        open_stream = lambda message, session_id: asgi_stream(main.app, "/api/chat/stream", {"message": message, "session_id": session_id})
+    else:
+        server, server_task, base_url = await stub_agent.serve(main.app)
+        client = httpx.AsyncClient(base_url=base_url, timeout=None, limits=httpx.Limits(max_connections=None, max_keepalive_connections=None))
+
+        async def open_stream(message: str, session_id: str):
+            request = client.build_request("POST", "/api/chat/stream", json={"message": message, "session_id": session_id})
+            response = await client.send(request, stream=True)
+
+            async def body():
+                try:
+                    async for chunk in response.aiter_raw():
+                        yield chunk
+                finally:
+                    await response.aclose()
+            return response.status_code, body()
+
+    started = time.perf_counter()
+    sessions = await asyncio.gather(*(
+        run_session(open_stream, f"load-{i}", args.turns, args.think_time) for i in range(args.sessions)
+    ))
+    wall = time.perf_counter() - started
+
+    if server is not None:
+        await client.aclose()
+        server.should_exit = True
+        await server_task
+    print(f"{args.sessions} sessions x {args.turns} turns over {args.transport}, "
+          f"stub agent {args.chunks} chunks every {args.chunk_delay * 1000:.0f} ms, "
+          f"CHAT_MAX_ACTIVE={main.chat_admission.max_active} CHAT_MAX_QUEUE={main.chat_admission.max_queue}\n")
+    report([r for session in sessions for r in session], wall, runner)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--chunks", type=int, default=40)
+    parser.add_argument("--chunk-delay", type=float, default=0.01)
+    parser.add_argument("--think-time", type=float, default=0.0)
+    parser.add_argument("--transport", choices=("asgi", "http"), default="asgi")
+    parser.add_argument("--max-active", type=int, default=None)
+    parser.add_argument("--max-queue", type=int, default=None)
+    args = parser.parse_args()
+    if args.max_active is not None:
+        os.environ["CHAT_MAX_ACTIVE"] = str(args.max_active)
+    if args.max_queue is not None:
+        os.environ["CHAT_MAX_QUEUE"] = str(args.max_queue)
+
+    import main as chat_main
+    runner = stub_agent.install(chat_main, chunks=args.chunks, chunk_delay=args.chunk_delay, route=route)
+    asyncio.run(load(chat_main, runner, args))
+
+
+if __name__ == "__main__":
+    main()
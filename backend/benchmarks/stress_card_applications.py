@@ -0,0 +1,98 @@
+"""
+Stress test: many concurrent /api/cards/apply calls, with duplicates per user.
+
+Every synthetic user qualifies for the Legionnaire card and submits several
+applications at once. Afterwards each user must hold exactly one approved
+application and have been saved exactly once; any lost or doubled write is
+reported. Runs against temporary JSON and SQLite stores.
+
+Usage: python benchmarks/stress_card_applications.py [--users 200] [--duplicates 5]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI
+
+import stub_agent
+import repositories.factory as factory
+from repositories.json_repository import JsonRepository
+from repositories.sqlite_repository import SqliteRepository
+from routers import auth, cards
+from services.auth_service import create_access_token
+
+
+def open_repository(backend: str, directory: Path):
+    json_repository = JsonRepository(
+        directory / "users.json",
+        directory / "applications.json",
+        directory / "applications.ndjson",
+        flush_window=0.01
+    )
+    if backend == "json":
+        return json_repository
+    repository = SqliteRepository(directory / "stress.db")
+    repository.add_users(json_repository.iter_users())
+    return repository
+
+
+async def run(backend: str, user_count: int, duplicates: int):
+    app = FastAPI()
+    app.include_router(auth.router)
+    app.include_router(cards.router)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        user_ids = stub_agent.build_store(directory, user_count, "stress")
+        repository = factory._repository = open_repository(backend, directory)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://stress") as client:
+            async def apply(user_id: str) -> str:
+                token = create_access_token({"user_id": user_id})
+                response = await client.post(
+                    "/api/cards/apply",
+                    json={"cardSlug": "legionnaire"},
+                    headers={"Authorization": f"Bearer {token}"}
+                )
+                response.raise_for_status()
+                return response.json()["status"]
+
+            started = time.perf_counter()
+            statuses = await asyncio.gather(*(apply(u) for u in user_ids for _ in range(duplicates)))
+            elapsed = time.perf_counter() - started
+
+        repository.reload()
+        approvals = Counter(a.userId for a in repository.iter_applications() if a.status == "approved")
+        users = {u.id: u for u in repository.iter_users()}
+        errors = [u for u in user_ids if approvals[u] != 1 or users[u].currentCard != "legionnaire" or users[u].version != 1]
+
+    total = len(statuses)
+    print(f"{backend:6s} requests={total} approved={statuses.count('approved')} "
+          f"rejected={statuses.count('rejected')} {total / elapsed:7.1f} req/s "
+          f"inconsistent_users={len(errors)}")
+    return not errors
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--duplicates", type=int, default=5)
+    args = parser.parse_args()
+
+    ok = True
+    for backend in ("json", "sqlite"):
+        ok &= await run(backend, args.users, args.duplicates)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,139 @@
+"""
+Offline stand-in for the ADK runner, shared by the chat endpoint checks.
+
+`install(main)` replaces `main.runner` with a StubRunner that loads the
+session like the real runner does, then yields an agent transfer and a
+fixed number of text events at a fixed pace, without calling any model.
+Like the real runner it appends the user message and each event it yields
+to the session. `route` picks the specialist for a message (Jenny by
+default); routing to Sam answers without a transfer. The specialist calls
+each tool named in `tools` before answering.
+It counts started, finished and cancelled runs so checks can assert what
+happened to each turn. `serve(app)` starts a real uvicorn server on a free
+local port, since streaming behaviour only shows up over a socket.
+`build_store(directory, n)` writes a users.json of n synthetic card-less
+users for the storage benchmarks. `admin_headers()` authorizes the /api/admin endpoints as the first user of
+the demo store, adding it to ADMIN_USERNAMES.
+
+Importing this module sets placeholder values for the environment variables
+main.py needs at import time.
+"""
+import os
+import sys
+import json
+import asyncio
+from pathlib import Path
+from typing import Callable, Sequence
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+for name, value in (
+    ("GOOGLE_GENAI_MODEL", "gemini-2.0-flash"),
+    ("DATADOG_API_KEY", "offline"),
+    ("DD_API_KEY", "offline"),
+    ("DD_LLMOBS_ENABLED", "0"),
+    ("DD_TRACE_GOOGLE_ADK_ENABLED", "false"),
+    ("DD_TRACE_ENABLED", "false"),
+):
+    os.environ.setdefault(name, value)
+
+import uvicorn
+from google.adk.events.event import Event
+from google.genai import types
+
+
+class StubRunner:
+    def __init__(self, session_service, app_name: str, chunks: int = 20, chunk_delay: float = 0.01,
+                 route: Callable[[str], str] = lambda message: "Jenny", tools: Sequence[str] = ()):
+        self.session_service = session_service
+        self.app_name = app_name
+        self.chunks = chunks
+        self.chunk_delay = chunk_delay
+        self.route = route
+        self.tools = tools
+        self.started = 0
+        self.finished = 0
+        self.cancelled = 0
+        self.running = 0
+        self.max_running_per_session = {}
+        self._running_per_session = {}
+
+    async def run_async(self, user_id: str, session_id: str, new_message, **kwargs):
+        session = await self.session_service.get_session(app_name=self.app_name, user_id=user_id, session_id=session_id)
+        if session is None:
+            raise ValueError(f"Session not found: {session_id}")
+        self.started += 1
+        self.running += 1
+        invocation_id = "e-" + Event.new_id()
+        per_session = self._running_per_session.get(session_id, 0) + 1
+        self._running_per_session[session_id] = per_session
+        self.max_running_per_session[session_id] = max(self.max_running_per_session.get(session_id, 0), per_session)
+        try:
+            await self.session_service.append_event(session, Event(author="user", invocation_id=invocation_id, content=new_message))
+            agent = self.route(new_message.parts[0].text or "")
+            if agent != "Sam":
+                event = Event(author="Sam", invocation_id=invocation_id, content=types.Content(role="model", parts=[
+                    types.Part(function_call=types.FunctionCall(name="transfer_to_agent", args={"agent_name": agent}))
+                ]))
+                yield await self.session_service.append_event(session, event)
+            for tool in self.tools:
+                event = Event(author=agent, invocation_id=invocation_id, content=types.Content(role="model", parts=[
+                    types.Part(function_call=types.FunctionCall(name=tool, args={}))
+                ]))
+                yield await self.session_service.append_event(session, event)
+                event = Event(author=agent, invocation_id=invocation_id, content=types.Content(role="user", parts=[
+                    types.Part(function_response=types.FunctionResponse(name=tool, response={"status": "success"}))
+                ]))
+                yield await self.session_service.append_event(session, event)
+            for i in range(self.chunks):
+                await asyncio.sleep(self.chunk_delay)
+                event = Event(author=agent, invocation_id=invocation_id, content=types.Content(role="model", parts=[
+                    types.Part(text=f"chunk {i} ")
+                ]))
+                yield await self.session_service.append_event(session, event)
+            self.finished += 1
+        except (asyncio.CancelledError, GeneratorExit):
+            self.cancelled += 1
+            raise
+        finally:
+            self.running -= 1
+            self._running_per_session[session_id] -= 1
+
+
+def install(main, **kwargs) -> StubRunner:
+    """Swap main.runner for a StubRunner over the same session service"""
+    main.runner = StubRunner(main.runner.session_service, main.runner.app_name, **kwargs)
+    return main.runner
+
+
+def build_store(directory: Path, user_count: int, prefix: str = "bench") -> list:
+    """Write a users.json with user_count card-less users and return their IDs"""
+    from repositories.factory import USERS_FILE
+    template = json.loads(USERS_FILE.read_text())[0]
+    users = []
+    for i in range(user_count):
+        user = dict(template, id=f"{prefix}-{i}", username=f"{prefix}_{i}", email=f"{prefix}{i}@example.com")
+        user.update(currentCard=None, rejectionDate=None, interestRate=None)
+        users.append(user)
+    (directory / "users.json").write_text(json.dumps(users, indent=2))
+    return [u["id"] for u in users]
+
+
+def admin_headers() -> dict:
+    """Bearer token header for the first user in data/users.json, allowed as an admin"""
+    from repositories.factory import get_repository
+    from routers.auth import ADMIN_USERNAMES
+    from services.auth_service import create_access_token
+    user = next(get_repository().iter_users())
+    ADMIN_USERNAMES.add(user.username)
+    return {"Authorization": f"Bearer {create_access_token({'user_id': user.id})}"}
+
+
+async def serve(app):
+    """Start uvicorn on a free local port; returns (server, task, base_url)"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return server, task, f"http://127.0.0.1:{port}"
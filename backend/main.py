@@ -2,22 +2,38 @@
 FastAPI backend for Travel Planner with streaming support
 """
 import os, json, asyncio, sys
+from contextlib import aclosing, asynccontextmanager
 from ddtrace.llmobs import LLMObs
 from ddtrace.llmobs.decorators import workflow, agent
 from ddtrace.appsec.track_user_sdk import track_custom_event
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from google.adk.runners import InMemoryRunner
+from google.adk.artifacts import InMemoryArtifactService
+from google.adk.memory import InMemoryMemoryService
+from google.adk.runners import Runner
 from google.genai import types
 
 # Add parent directory to path to import travel_planner
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from travel_planner.agent import root_agent
+from repositories.factory import get_repository
+from services.application_service import get_application_stats_async
+from services.auth_service import get_token_cache_stats
+from services.storage_executor import storage_stats
+from streaming.events import classify_event
+from streaming.admission import ChatAdmission, ChatSaturated
+from streaming.encoder import SSEEncoder
+from streaming.flush import Frame, FlushPolicy
+from streaming.metrics import ChatMetrics, render_stats
+from streaming.response import ChatStreamingResponse
+from streaming.response_cache import FirstTurnCache
+from streaming.turns import GAP_MESSAGE, ChatTurns, ReplayGap
+from sessions.factory import create_session_service
 
 # Load environment variables
 load_dotenv()
@@ -32,10 +48,24 @@ LLMObs.enable(
   service="travel-planner-api",
 )
 
-# Create runner instance
-runner = InMemoryRunner(agent=root_agent, app_name="travel-planner")
+# Create runner instance; SESSION_BACKEND picks a bounded in-memory or a shared SQLite session store
+session_service = create_session_service()
+runner = Runner(
+    agent=root_agent,
+    app_name="travel-planner",
+    session_service=session_service,
+    artifact_service=InMemoryArtifactService(),
+    memory_service=InMemoryMemoryService()
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm process-wide state before serving traffic"""
+    # Load persisted card application aggregates, or rebuild them from history
+    await get_application_stats_async()
+    yield
 
-app = FastAPI(title="Travel Planner API")
+app = FastAPI(title="Travel Planner API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -48,6 +78,7 @@ app.add_middleware(
 
 # Include routers
 from routers import auth, cards
+from routers.auth import require_admin
 
 app.include_router(auth.router)
 app.include_router(cards.router)
@@ -59,9 +90,45 @@ class ChatRequest(BaseModel):
 
 
 class ChatMessage(BaseModel):
+    """Wire format of one SSE frame; streaming/encoder.py emits it byte-for-byte"""
     type: str  # "agent_transfer", "content", "done", "error"
     data: dict
 
+
+# How agent output is coalesced into SSE writes (see streaming/flush.py)
+flush_policy = FlushPolicy.from_env()
+sse_encoder = SSEEncoder()
+# Concurrent agent turns per worker, and one turn at a time per session
+chat_admission = ChatAdmission.from_env()
+# How chat turns ended: completed, error, or client_aborted when the client disconnected mid-stream
+chat_outcomes = {"completed": 0, "error": 0, "client_aborted": 0}
+# Turns run in the background with a replay buffer per session, so dropped streams can resume
+chat_turns = ChatTurns.from_env()
+# Opt-in replay of responses to identical first messages (CHAT_RESPONSE_CACHE=1)
+response_cache = FirstTurnCache.from_env()
+def registered_tools(agent) -> set:
+    """Names of the tools of an agent and all of its sub-agents"""
+    names = {tool.name for tool in getattr(agent, "tools", ()) if hasattr(tool, "name")}
+    for sub_agent in agent.sub_agents:
+        names |= registered_tools(sub_agent)
+    return names
+
+def registered_agents(agent) -> set:
+    """Names of an agent and all of its sub-agents"""
+    names = {agent.name}
+    for sub_agent in agent.sub_agents:
+        names |= registered_agents(sub_agent)
+    return names
+
+# Latency histograms and agent behaviour counters served by /api/metrics
+chat_metrics = ChatMetrics(tool_names=registered_tools(root_agent), agent_names=registered_agents(root_agent))
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no"
+}
+
 @agent
 def get_agent_friendly_message(agent_name: str) -> str:
     """Generate user-friendly transfer messages based on agent name"""
@@ -76,137 +143,128 @@ def get_agent_friendly_message(agent_name: str) -> str:
     return messages.get(agent_name, f"Transferring you to {agent_name}...")
 
 
-async def stream_agent_response(message: str, session_id: str) -> AsyncGenerator[str, None]:
+async def stream_agent_response(message: str, session_id: str) -> AsyncGenerator[Frame, None]:
     """
     Stream agent responses with agent transfer notifications
     """
+    recorded = None  # ADK events of the run, collected when the turn may be cached
+    turn_metrics = chat_metrics.start_turn("Sam")
+
     @workflow(session_id=session_id)
-    async def run_agent(message: str, session_id: str, current_agent: str, sub_agents: set) -> AsyncGenerator[str, None]:
+    async def run_agent(message: str, session_id: str, current_agent: str, sub_agents: set) -> AsyncGenerator[Frame, None]:
         """
         Run the agent and stream events with agent transfer notifications
         """
-        # Run the agent with async streaming
-        async for event in runner.run_async(
+        # Run the agent with async streaming; closing the stream on disconnect stops the run
+        events = runner.run_async(
             user_id=session_id,  # Use session_id as user_id for anonymous users
             session_id=session_id,
             new_message=types.Content(
                 role="user",
                 parts=[types.Part(text=message)]
             )
-        ):
-            # Get the content from the event - events have a 'content' attribute with parts
-            event_content = None
-            if hasattr(event, 'content'):
-                event_content = event.content
-
-            # Check for agent transfers by examining event attributes
-            event_agent = None
-
-            # Try to get agent name from various possible attributes
-            if hasattr(event, 'agent'):
-                event_agent = event.agent
-            elif hasattr(event, 'agent_name'):
-                event_agent = event.agent_name
-            elif hasattr(event, 'metadata') and isinstance(event.metadata, dict):
-                event_agent = event.metadata.get('agent_name') or event.metadata.get('agent')
-            # Check for agent transfer in content parts (Google ADK function calls)
-            elif event_content and hasattr(event_content, 'parts') and event_content.parts:
-                for part in event_content.parts:
-                    if hasattr(part, 'function_call') and part.function_call:
-                        func_call = part.function_call
-                        if hasattr(func_call, 'name') and func_call.name == 'transfer_to_agent':
-                            if hasattr(func_call, 'args') and isinstance(func_call.args, dict):
-                                event_agent = func_call.args.get('agent_name')
-                                break
-
-            # Stream content based on event type
-            content_text = None
-
-            # Handle Google ADK Event objects with content.parts
-            if event_content and hasattr(event_content, 'parts') and event_content.parts:
-                # Extract text from parts, ignoring function calls and responses
-                text_parts = []
-                has_function_call = False
-                has_function_response = False
-
-                for part in event_content.parts:
-                    if hasattr(part, 'text') and part.text:
-                        text_parts.append(part.text)
-                    elif hasattr(part, 'function_call'):
-                        has_function_call = True
-                    elif hasattr(part, 'function_response'):
-                        has_function_response = True
-
-                if text_parts:
-                    content_text = ''.join(text_parts)
-
-            # Detect when sub-agent returns to Sam
-            # If we have content but no explicit agent identifier, and we're currently with a sub-agent,
-            # then we've returned to Sam
-            # if content_text and not event_agent and current_agent in sub_agents:
-            #     event_agent = "Sam"
-
-            # Send transfer message if agent changed
-            if event_agent and event_agent != current_agent:
-                current_agent = event_agent
-                transfer_msg = ChatMessage(
-                    type="agent_transfer",
-                    data={
-                        "agent": event_agent,
-                        "message": get_agent_friendly_message(event_agent)
-                    }
-                )
-                yield f"data: {transfer_msg.model_dump_json()}\n\n"
-                await asyncio.sleep(0.1)
-
-            if content_text:
-                content_msg = ChatMessage(
-                    type="content",
-                    data={"text": content_text}
-                )
-                yield f"data: {content_msg.model_dump_json()}\n\n"
-                await asyncio.sleep(0.01)  # Small delay to avoid overwhelming client
+        )
+        try:
+            async with aclosing(events):
+                async for event in events:
+                    if recorded is not None:
+                        recorded.append(event)
+                    # Resolve acting agent, text and function calls in one pass
+                    info = classify_event(event)
+                    event_agent = info.agent
+                    content_text = info.text
+                    for name, _ in info.function_calls:
+                        if name != "transfer_to_agent":
+                            turn_metrics.tool_call(name)
+
+                    # Detect when sub-agent returns to Sam
+                    # If we have content but no explicit agent identifier, and we're currently with a sub-agent,
+                    # then we've returned to Sam
+                    # if content_text and not event_agent and current_agent in sub_agents:
+                    #     event_agent = "Sam"
+
+                    # Send transfer message if agent changed
+                    if event_agent and event_agent != current_agent:
+                        current_agent = event_agent
+                        yield Frame(
+                            type="agent_transfer",
+                            data={
+                                "agent": event_agent,
+                                "message": get_agent_friendly_message(event_agent)
+                            }
+                        )
+
+                    if content_text:
+                        yield Frame(type="content", data={"text": content_text})
+        except (asyncio.CancelledError, GeneratorExit):
+            # The client disconnected; tag the workflow span before it is finished
+            if LLMObs.enabled:
+                LLMObs.annotate(tags={"outcome": "client_aborted"})
+            raise
 
         # Send completion message
-        done_msg = ChatMessage(
-            type="done",
-            data={"message": "Response complete"}
-        )
-        yield f"data: {done_msg.model_dump_json()}\n\n"
+        yield Frame(type="done", data={"message": "Response complete"})
 
     try:
         current_agent = "Sam"  # Start with root agent
         sub_agents = {"Jenny", "Marcus", "Sofia", "Luca", "Alex"}  # Known sub-agents
 
-        # Ensure session exists before running the agent
-        existing_session = await runner.session_service.get_session(
+        # Ensure session exists before running the agent; concurrent first messages create it once
+        created = await runner.session_service.get_or_create_session(
             app_name="travel-planner",
             user_id=session_id,
             session_id=session_id
         )
 
-        if existing_session is None:
-            # Create new session with the frontend-provided session_id
-            await runner.session_service.create_session(
+        # A session created by this turn is empty, so the response depends only on the message
+        cache_key = response_cache.key(message, current_agent, 0) if created else None
+        cached = response_cache.get(cache_key) if cache_key else None
+        if cached:
+            # Record the turn in the session history, then replay it without calling the model
+            session = await runner.session_service.get_session(
                 app_name="travel-planner",
                 user_id=session_id,
                 session_id=session_id
             )
-
-        # Run the agent and stream responses
-        async for event in run_agent(message, session_id, current_agent, sub_agents):
-            yield event
+            await response_cache.record(runner.session_service, session, message, cached)
+            for frame in cached.frames:
+                turn_metrics.frame(frame)
+                yield frame
+            chat_outcomes["completed"] += 1
+            return
+
+        # Run the agent and stream its frames
+        produced = [] if cache_key else None
+        recorded = [] if cache_key else None
+        frames = run_agent(message, session_id, current_agent, sub_agents)
+        async with aclosing(frames):
+            async for frame in frames:
+                if produced is not None:
+                    produced.append(frame)
+                turn_metrics.frame(frame)
+                yield frame
+        chat_outcomes["completed"] += 1
+        if cache_key:
+            response_cache.put(cache_key, produced, recorded)
+
+    except (asyncio.CancelledError, GeneratorExit):
+        chat_outcomes["client_aborted"] += 1
+        raise
 
     except Exception as e:
+        chat_outcomes["error"] += 1
+        turn_metrics.error(e)
         import traceback
         error_detail = traceback.format_exc()
         print(f"Error in stream_agent_response: {error_detail}")
 
-        error_msg = ChatMessage(
+        yield Frame(
             type="error",
             data={"message": str(e), "detail": error_detail}
         )
-        yield f"data: {error_msg.model_dump_json()}\n\n"
+
+    finally:
+        turn_metrics.finish()
 
 
 @app.post("/api/chat/stream")
@@ -214,23 +272,98 @@ async def chat_stream(request: ChatRequest):
     """
     Stream chat responses with Server-Sent Events
     """
-    return StreamingResponse(
+    try:
+        lease = await chat_admission.acquire(request.session_id)
+    except ChatSaturated as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many chat requests in progress, please retry",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    # The turn's frames are paced by the flush policy and buffered with SSE ids
+    turn = chat_turns.start(
+        request.session_id,
         stream_agent_response(request.message, request.session_id),
+        lease,
+        flush_policy,
+        sse_encoder.encode_event
+    )
+    return ChatStreamingResponse(
+        turn.follow(turn.first_id - 1),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
+        headers=SSE_HEADERS
     )
 
 
+@app.get("/api/chat/stream/{session_id}")
+async def resume_chat_stream(session_id: str, last_event_id: Optional[str] = Header(None)):
+    """
+    Resume a dropped chat stream: replay frames after Last-Event-ID, then follow the running turn
+    """
+    try:
+        last_id = int(last_event_id) if last_event_id else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    try:
+        frames = chat_turns.resume(session_id, last_id)
+    except ReplayGap:
+        raise HTTPException(status_code=410, detail=GAP_MESSAGE)
+    if frames is None:
+        raise HTTPException(status_code=404, detail="No resumable stream for this session")
+    return ChatStreamingResponse(frames, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "travel-planner"}
 
 
+@app.get("/api/admin/sessions", dependencies=[Depends(require_admin)])
+async def session_summary():
+    """Chat session store summary: count, estimated bytes, oldest session and evictions"""
+    return await session_service.summary()
+
+
+@app.get("/api/admin/admission", dependencies=[Depends(require_admin)])
+async def admission_summary():
+    """Chat admission metrics: active turns, queue depth, wait times, rejections, turn outcomes and resumes"""
+    return dict(chat_admission.stats(), outcomes=dict(chat_outcomes), turns=chat_turns.stats())
+
+
+@app.get("/api/admin/response-cache", dependencies=[Depends(require_admin)])
+async def response_cache_summary():
+    """First-turn response cache: whether it is enabled, entries, hits, misses and evictions"""
+    return response_cache.stats()
+
+
+@app.get("/api/admin/storage", dependencies=[Depends(require_admin)])
+async def storage_summary():
+    """Storage metrics: thread pool calls and the backend's counters (user store group commits for JSON)"""
+    return dict(storage_stats(), repository=get_repository().metrics())
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: chat latency histograms, transfers, tool calls, errors, admission, turns, caches and stores"""
+    sessions = await session_service.summary()
+    return PlainTextResponse(
+        chat_metrics.render()
+        + render_stats("chat_turns", {"outcomes": chat_outcomes}, counters=("outcomes",))
+        + render_stats("chat_admission", chat_admission.stats(), counters=("admitted", "rejected", "timed_out"))
+        + render_stats("chat_resume", chat_turns.stats(), counters=("turns", "resumes", "frames_replayed", "gaps"))
+        + render_stats("chat_sessions", sessions, counters=("evictions", "known_hits", "lookups", "created", "coalesced", "cache_hits", "cache_misses", "events_loaded"))
+        + render_stats("chat_response_cache", response_cache.stats(), counters=("hits", "misses", "stores", "expirations", "evictions"))
+        + render_stats("token_cache", get_token_cache_stats(), counters=("hits", "misses", "expirations", "evictions", "purges"))
+        + render_stats("storage", storage_stats(), counters=("calls",))
+        + "".join(
+            render_stats(f"storage_{component}", values, counters=("flush_count", "users_flushed", "saves", "write_errors"))
+            for component, values in get_repository().metrics().items()
+        ),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Literal, Optional
+from typing import Dict, List, Literal, Optional
 
 class ApplicationData(BaseModel):
     salary: float
@@ -17,6 +17,23 @@ class Application(BaseModel):
     applicationDate: str  # ISO 8601
     userData: ApplicationData
 
+class ApplicationPage(BaseModel):
+    applications: List[Application]  # Newest first
+    nextCursor: Optional[str]  # Pass back as ?cursor= for older applications
+
+class ApprovalBucket(BaseModel):
+    applications: int
+    approved: int
+    approvalRate: float
+
+class ApplicationStats(BaseModel):
+    totalApplications: int
+    approvalRate: float
+    byCard: Dict[str, ApprovalBucket]
+    byTier: Dict[str, ApprovalBucket]
+    byDay: Dict[str, ApprovalBucket]  # YYYY-MM-DD, most recent days only
+    averageAprByTier: Dict[str, Optional[float]]
+
 class ApplicationRequest(BaseModel):
     cardSlug: Literal["legionnaire", "tribune"]
 
@@ -23,6 +23,7 @@ class User(BaseModel):
     interestRate: Optional[float] = None
     createdAt: str
     updatedAt: str
+    version: int = 0  # Incremented on every save for optimistic concurrency
 
 class UserResponse(BaseModel):
     """User data returned to frontend (no password)"""
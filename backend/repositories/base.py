@@ -0,0 +1,104 @@
+import base64
+from abc import ABC, abstractmethod
+from typing import Callable, Iterator, List, Optional, Tuple
+from models.application import Application
+from models.user import User
+
+def encode_cursor(position: int) -> str:
+    """Opaque pagination cursor for a backend-specific position"""
+    return base64.urlsafe_b64encode(str(position).encode()).decode()
+
+def decode_cursor(cursor: str) -> int:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors and positions below 1"""
+    try:
+        position = int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (UnicodeError, ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if position < 1:
+        # Every backend hands out positive positions
+        raise ValueError("Invalid cursor")
+    return position
+
+
+class StaleUserError(Exception):
+    """Raised when saving a user whose version no longer matches the stored one"""
+
+
+class Repository(ABC):
+    """Storage interface behind user_service and application_service"""
+
+    @abstractmethod
+    def get_user_by_id(self, user_id: str) -> Optional[User]:
+        """Find user by ID"""
+
+    @abstractmethod
+    def get_user_by_username(self, username: str) -> Optional[User]:
+        """Find user by username"""
+
+    @abstractmethod
+    def save_user(self, user: User, wait: bool = False) -> User:
+        """
+        Persist an existing user; wait=True blocks until the write is durable.
+
+        Raises StaleUserError if user.version differs from the stored version,
+        otherwise bumps the version on both the stored and the passed user.
+        """
+
+    @abstractmethod
+    def iter_users(self) -> Iterator[User]:
+        """Stream every stored user"""
+
+    @abstractmethod
+    def append_application(self, application: Application):
+        """Persist a new application record"""
+
+    @abstractmethod
+    def iter_applications(self) -> Iterator[Application]:
+        """Stream every stored application, oldest first"""
+
+    @abstractmethod
+    def list_user_applications(
+        self,
+        user_id: str,
+        cursor: Optional[str] = None,
+        limit: int = 20
+    ) -> Tuple[List[Application], Optional[str]]:
+        """
+        One page of a user's applications, newest first, and the cursor for
+        the next page (None when there are no older applications).
+        """
+
+    @abstractmethod
+    def record_application(
+        self,
+        user: User,
+        application: Application,
+        on_recorded: Optional[Callable[[str], None]] = None
+    ) -> User:
+        """
+        Update the applicant and insert the application as one unit of work.
+
+        `on_recorded` is called with the applications watermark right after
+        this insert, before any other application can be recorded, so
+        callbacks see applications in watermark order.
+        """
+
+    def applications_watermark(self) -> Optional[str]:
+        """Opaque marker that changes whenever applications are added or rewritten"""
+        return None
+
+    def applications_since(self, watermark: Optional[str]) -> Optional[Iterator[Tuple[str, Application]]]:
+        """
+        Stream the applications stored after `watermark` (all of them when
+        None) by any process, oldest first, each with the watermark right
+        after it. Returns None if the store cannot resume from `watermark`
+        (it was rewritten, or the watermark is from another backend).
+        """
+        return None
+
+    def reload(self):
+        """Discard any cached state and re-read the backing store"""
+
+    def metrics(self) -> dict:
+        """Backend-specific storage counters"""
+        return {}
@@ -0,0 +1,41 @@
+import os, threading
+from typing import Optional
+from pathlib import Path
+from repositories.base import Repository
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+USERS_FILE = DATA_DIR / "users.json"
+APPLICATIONS_FILE = DATA_DIR / "applications.json"
+APPLICATIONS_LOG_FILE = DATA_DIR / "applications.ndjson"
+STATS_FILE = DATA_DIR / "application_stats.json"
+SQLITE_FILE = Path(os.getenv("SQLITE_PATH", DATA_DIR / "travel_planner.db"))
+
+_repository: Optional[Repository] = None
+_lock = threading.Lock()
+
+def create_repository(backend: Optional[str] = None) -> Repository:
+    """Build the repository selected by STORAGE_BACKEND ("json" or "sqlite")"""
+    backend = backend or os.getenv("STORAGE_BACKEND", "json")
+    if backend == "sqlite":
+        from repositories.sqlite_repository import SqliteRepository
+        return SqliteRepository(SQLITE_FILE)
+    if backend == "json":
+        from repositories.json_repository import JsonRepository
+        return JsonRepository(
+            USERS_FILE,
+            APPLICATIONS_FILE,
+            APPLICATIONS_LOG_FILE,
+            mode=os.getenv("APPLICATION_STORAGE", "log"),
+            fsync=os.getenv("APPLICATION_LOG_FSYNC", "0") == "1",
+            flush_window=float(os.getenv("USER_FLUSH_WINDOW_MS", "10")) / 1000
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+def get_repository() -> Repository:
+    """Process-wide repository instance"""
+    global _repository
+    if _repository is None:
+        with _lock:
+            if _repository is None:
+                _repository = create_repository()
+    return _repository
@@ -0,0 +1,23 @@
+"""
+Import the JSON demo data into the SQLite backend.
+
+Usage: python -m repositories.importer [path/to/travel_planner.db]
+"""
+import sys
+from typing import Tuple
+from pathlib import Path
+from repositories.factory import create_repository, SQLITE_FILE
+from repositories.sqlite_repository import SqliteRepository
+
+def import_json(target: SqliteRepository) -> Tuple[int, int]:
+    """Copy every user and application from the JSON backend into target"""
+    source = create_repository("json")
+    users = target.add_users(source.iter_users())
+    applications = target.add_applications(source.iter_applications())
+    return users, applications
+
+
+if __name__ == "__main__":
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else SQLITE_FILE
+    users, applications = import_json(SqliteRepository(path))
+    print(f"Imported {users} users and {applications} applications into {path}")
@@ -0,0 +1,122 @@
+import json, threading
+from typing import Callable, Iterator, List, Optional, Tuple
+from pathlib import Path
+from models.application import Application
+from models.user import User
+from repositories.base import Repository, decode_cursor, encode_cursor
+from services.user_store import UserStore
+from services.application_log import ApplicationLog
+
+class JsonRepository(Repository):
+    """
+    File-based storage for demos: users.json plus either the append-only
+    application log ("log" mode) or the legacy applications.json array
+    ("json" mode). Writes are not transactional.
+    """
+
+    def __init__(
+        self,
+        users_path: Path,
+        applications_path: Path,
+        log_path: Path,
+        mode: str = "log",
+        fsync: bool = False,
+        flush_window: float = 0.0
+    ):
+        self.applications_path = applications_path
+        self.mode = mode
+        self._users = UserStore(users_path, flush_window=flush_window)
+        self._log = ApplicationLog(log_path, fsync=fsync)
+        # Orders on_recorded callbacks like the appends they follow
+        self._record_lock = threading.Lock()
+        if mode == "log":
+            self._log.migrate_from_json(applications_path)
+
+    def get_user_by_id(self, user_id: str) -> Optional[User]:
+        return self._users.get_by_id(user_id)
+
+    def get_user_by_username(self, username: str) -> Optional[User]:
+        return self._users.get_by_username(username)
+
+    def save_user(self, user: User, wait: bool = False) -> User:
+        return self._users.save(user, wait=wait)
+
+    def iter_users(self) -> Iterator[User]:
+        return iter(self._users.all())
+
+    def append_application(self, application: Application) -> Optional[str]:
+        """Store one application and return the applications watermark right after it"""
+        if self.mode == "log":
+            _, position = self._log.append(application)
+            return f"log:{position}"
+        applications = list(self.iter_applications())
+        applications.append(application)
+        self.applications_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.applications_path, 'w') as f:
+            json.dump([app.model_dump() for app in applications], f, indent=2)
+        return self.applications_watermark()
+
+    def iter_applications(self) -> Iterator[Application]:
+        if self.mode == "log":
+            yield from self._log.iter_applications()
+            return
+        if not self.applications_path.exists():
+            return
+        with open(self.applications_path, 'r') as f:
+            data = json.load(f)
+        for app in data:
+            yield Application(**app)
+
+    def list_user_applications(
+        self,
+        user_id: str,
+        cursor: Optional[str] = None,
+        limit: int = 20
+    ) -> Tuple[List[Application], Optional[str]]:
+        before = decode_cursor(cursor) if cursor else None
+        if self.mode == "log":
+            page, position = self._log.user_page(user_id, before, limit)
+        else:
+            # Legacy array file has no index; demos only
+            history = [app for app in self.iter_applications() if app.userId == user_id]
+            end = len(history) if before is None else min(before, len(history))
+            position = max(0, end - limit)
+            page = history[position:end][::-1]
+            position = position or None
+        return page, (encode_cursor(position) if position is not None else None)
+
+    def record_application(
+        self,
+        user: User,
+        application: Application,
+        on_recorded: Optional[Callable[[str], None]] = None
+    ) -> User:
+        self.save_user(user, wait=True)
+        with self._record_lock:
+            watermark = self.append_application(application)
+            if on_recorded is not None:
+                on_recorded(watermark)
+        return user
+
+    def applications_watermark(self) -> Optional[str]:
+        if self.mode == "log":
+            return f"log:{self._log.size()}"
+        if not self.applications_path.exists():
+            return "json:0"
+        st = self.applications_path.stat()
+        return f"json:{st.st_size}:{st.st_mtime_ns}"
+
+    def applications_since(self, watermark: Optional[str]) -> Optional[Iterator[Tuple[str, Application]]]:
+        kind, _, value = (watermark or "log:0").partition(":")
+        if self.mode != "log" or kind != "log" or not value.isdigit():
+            return None
+        records = self._log.records_since(int(value))
+        if records is None:
+            return None
+        return ((f"log:{position}", Application(**record)) for position, record in records)
+
+    def reload(self):
+        self._users.reload()
+
+    def metrics(self) -> dict:
+        return {"user_store": self._users.metrics()}
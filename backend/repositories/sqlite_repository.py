@@ -0,0 +1,159 @@
+import sqlite3, threading
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from pathlib import Path
+from models.application import Application
+from models.user import User
+from repositories.base import Repository, StaleUserError, decode_cursor, encode_cursor
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_id ON users (id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username ON users (username);
+CREATE TABLE IF NOT EXISTS applications (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    userId TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_applications_userId ON applications (userId, seq);
+"""
+
+class SqliteRepository(Repository):
+    """
+    SQLite storage in WAL mode. Each thread gets its own connection; the
+    user update and application insert of `record_application` commit in a
+    single transaction so concurrent applications cannot lose writes.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._local = threading.local()
+        # Orders on_recorded callbacks like the inserts they follow
+        self._record_lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a write transaction, taking the database write lock up front"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get_user_by_id(self, user_id: str) -> Optional[User]:
+        row = self._conn().execute("SELECT data FROM users WHERE id = ?", (user_id,)).fetchone()
+        return User.model_validate_json(row[0]) if row else None
+
+    def get_user_by_username(self, username: str) -> Optional[User]:
+        row = self._conn().execute("SELECT data FROM users WHERE username = ?", (username,)).fetchone()
+        return User.model_validate_json(row[0]) if row else None
+
+    def save_user(self, user: User, wait: bool = False) -> User:
+        with self._transaction() as conn:
+            self._update_user(conn, user)
+        return user
+
+    def _update_user(self, conn: sqlite3.Connection, user: User):
+        row = conn.execute("SELECT data FROM users WHERE id = ?", (user.id,)).fetchone()
+        if row is None:
+            return
+        if User.model_validate_json(row[0]).version != user.version:
+            raise StaleUserError(f"User {user.id} was modified concurrently")
+        user.version += 1
+        conn.execute(
+            "UPDATE users SET username = ?, data = ? WHERE id = ?",
+            (user.username, user.model_dump_json(), user.id)
+        )
+
+    def iter_users(self) -> Iterator[User]:
+        for (data,) in self._conn().execute("SELECT data FROM users ORDER BY rowid"):
+            yield User.model_validate_json(data)
+
+    def add_users(self, users: Iterable[User]) -> int:
+        """Insert or replace users (used by the JSON importer)"""
+        rows = [(u.id, u.username, u.model_dump_json()) for u in users]
+        with self._transaction() as conn:
+            conn.executemany("INSERT OR REPLACE INTO users (id, username, data) VALUES (?, ?, ?)", rows)
+        return len(rows)
+
+    def append_application(self, application: Application):
+        self.add_applications([application])
+
+    def add_applications(self, applications: Iterable[Application]) -> int:
+        """Insert applications in one transaction, skipping IDs already stored"""
+        rows = [(a.id, a.userId, a.model_dump_json()) for a in applications]
+        with self._transaction() as conn:
+            conn.executemany("INSERT OR IGNORE INTO applications (id, userId, data) VALUES (?, ?, ?)", rows)
+        return len(rows)
+
+    def iter_applications(self) -> Iterator[Application]:
+        for (data,) in self._conn().execute("SELECT data FROM applications ORDER BY seq"):
+            yield Application.model_validate_json(data)
+
+    def list_user_applications(
+        self,
+        user_id: str,
+        cursor: Optional[str] = None,
+        limit: int = 20
+    ) -> Tuple[List[Application], Optional[str]]:
+        # Keyset pagination on (userId, seq) walks the index directly
+        before = decode_cursor(cursor) if cursor else None
+        rows = self._conn().execute(
+            "SELECT seq, data FROM applications WHERE userId = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+            (user_id, before if before is not None else 2 ** 63 - 1, limit + 1)
+        ).fetchall()
+        page = [Application.model_validate_json(data) for _, data in rows[:limit]]
+        next_cursor = encode_cursor(rows[limit - 1][0]) if len(rows) > limit else None
+        return page, next_cursor
+
+    def applications_watermark(self) -> Optional[str]:
+        # seq is AUTOINCREMENT, so its maximum grows with every insert; MAX on the key is a single seek
+        (last,) = self._conn().execute("SELECT MAX(seq) FROM applications").fetchone()
+        return f"sqlite:{last or 0}"
+
+    def applications_since(self, watermark: Optional[str]) -> Optional[Iterator[Tuple[str, Application]]]:
+        kind, _, value = (watermark or "sqlite:0").partition(":")
+        if kind != "sqlite" or not value.isdigit():
+            return None
+        (last,) = self._conn().execute("SELECT MAX(seq) FROM applications").fetchone()
+        if int(value) > (last or 0):
+            # Watermark from another database
+            return None
+        rows = self._conn().execute("SELECT seq, data FROM applications WHERE seq > ? ORDER BY seq", (int(value),))
+        return ((f"sqlite:{seq}", Application.model_validate_json(data)) for seq, data in rows)
+
+    def record_application(
+        self,
+        user: User,
+        application: Application,
+        on_recorded: Optional[Callable[[str], None]] = None
+    ) -> User:
+        with self._record_lock:
+            with self._transaction() as conn:
+                self._update_user(conn, user)
+                seq = conn.execute(
+                    "INSERT INTO applications (id, userId, data) VALUES (?, ?, ?)",
+                    (application.id, application.userId, application.model_dump_json())
+                ).lastrowid
+            if on_recorded is not None:
+                on_recorded(f"sqlite:{seq}")
+        return user
@@ -1,12 +1,16 @@
+import os
 from fastapi import APIRouter, HTTPException, Depends, Header
 from typing import Optional
 from models.auth import LoginRequest, LoginResponse
 from models.user import UserResponse
 from services.auth_service import create_access_token, get_current_user_id
-from services.user_service import authenticate_user, get_user_by_id, to_user_response
+from services.user_service import authenticate_user_async, get_user_by_id_async, to_user_response
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 
+# Usernames allowed on the /api/admin endpoints; empty allows any authenticated user
+ADMIN_USERNAMES = {name.strip() for name in os.getenv("ADMIN_USERNAMES", "").split(",") if name.strip()}
+
 def get_token_from_header(authorization: Optional[str] = Header(None)) -> str:
     """Extract JWT token from Authorization header"""
     if not authorization or not authorization.startswith("Bearer "):
@@ -19,16 +23,22 @@ async def get_current_user(token: str = Depends(get_token_from_header)) -> UserR
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
-    user = get_user_by_id(user_id)
+    user = await get_user_by_id_async(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     return to_user_response(user)
 
+async def require_admin(current_user: UserResponse = Depends(get_current_user)) -> UserResponse:
+    """Dependency for admin endpoints: an authenticated user listed in ADMIN_USERNAMES (nobody when unset)"""
+    if current_user.username not in ADMIN_USERNAMES:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
+
 @router.post("/login", response_model=LoginResponse)
 async def login(request: LoginRequest):
     """Authenticate user and return JWT token"""
-    user = authenticate_user(request.username, request.password)
+    user = await authenticate_user_async(request.username, request.password)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
@@ -1,12 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
-from models.application import ApplicationRequest, ApplicationResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+from models.application import ApplicationPage, ApplicationRequest, ApplicationResponse, ApplicationStats
 from models.user import UserResponse
-from services.application_service import process_application
-from services.user_service import get_user_by_id
+from services.application_service import (
+    process_application_async,
+    get_application_stats_async,
+    list_user_applications_async
+)
+from services.user_service import get_user_by_id_async
+from services.underwriting import prequalify_ndjson
+from streaming.response import RequestStreamingResponse
 from routers.auth import get_current_user
 
 router = APIRouter(prefix="/api/cards", tags=["cards"])
 
+PREQUALIFY_BATCH_LINES = 50_000
+
 @router.post("/apply", response_model=ApplicationResponse)
 async def apply_for_card(
     request: ApplicationRequest,
@@ -14,10 +24,57 @@ async def apply_for_card(
 ):
     """Apply for a credit card"""
     # Get full user object (with password) for internal processing
-    user = get_user_by_id(current_user.id)
+    user = await get_user_by_id_async(current_user.id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Process application
-    result = process_application(user, request.cardSlug)
+    result = await process_application_async(user, request.cardSlug)
     return result
+
+@router.post("/prequalify/batch")
+async def prequalify_batch(
+    request: Request,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Pre-qualify NDJSON applicant records against every card
+
+    Results are streamed back one batch at a time while the request body is
+    still being read, so memory is bounded by PREQUALIFY_BATCH_LINES.
+    """
+    async def results():
+        batch, pending, line_number = [], b"", 1
+        async for chunk in request.stream():
+            *lines, pending = (pending + chunk).split(b"\n")
+            batch.extend(lines)
+            if len(batch) >= PREQUALIFY_BATCH_LINES:
+                yield await run_in_threadpool(prequalify_ndjson, batch, line_number)
+                line_number += len(batch)
+                batch = []
+        if pending:
+            batch.append(pending)
+        if batch:
+            yield await run_in_threadpool(prequalify_ndjson, batch, line_number)
+
+    return RequestStreamingResponse(results(), media_type="application/x-ndjson")
+
+@router.get("/stats", response_model=ApplicationStats)
+async def application_stats(
+    days: int = Query(30, ge=0, le=366),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Approval rates by card, tier and day plus average APR by tier"""
+    return await get_application_stats_async(days)
+
+@router.get("/applications", response_model=ApplicationPage)
+async def list_applications(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """List the authenticated user's applications, newest first"""
+    try:
+        return await list_user_applications_async(current_user.id, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
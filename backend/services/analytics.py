@@ -0,0 +1,159 @@
+import atexit, json, os, threading, time
+from collections import defaultdict
+from typing import Dict, Iterable, Optional
+from pathlib import Path
+from models.application import Application, ApplicationStats, ApprovalBucket
+from repositories.base import Repository
+
+class ApplicationAnalytics:
+    """
+    Incrementally maintained approval aggregates by card, tier and day, plus
+    APR totals by tier for approved applications.
+
+    The aggregates always cover exactly the applications up to their
+    watermark. `record()` and `snapshot()` catch up by folding in every
+    application stored after it, by this or any other worker process, so
+    workers sharing a store report the same figures. The aggregates are
+    written to a small JSON file tagged with their watermark at most every
+    `persist_interval` seconds and by `flush()` at exit; whichever worker
+    writes it last, the next start loads it and catches up from there. The
+    history is streamed in full only when the store cannot resume from the
+    watermark (it was compacted or replaced, or the backend changed).
+    """
+
+    def __init__(self, path: Path, persist_interval: float = 5.0):
+        self.path = path
+        self.persist_interval = persist_interval
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._watermark: Optional[str] = None
+        self._unsaved = 0
+        self._persisted_at = 0.0
+        self._reset()
+        atexit.register(self.flush)
+
+    @classmethod
+    def from_env(cls, path: Path) -> "ApplicationAnalytics":
+        """Build with APPLICATION_STATS_PERSIST_SECONDS as the persist interval"""
+        return cls(path, persist_interval=float(os.getenv("APPLICATION_STATS_PERSIST_SECONDS", "5")))
+
+    def _reset(self):
+        # counts[dimension][key] = [applications, approved]
+        self._counts: Dict[str, Dict[str, list]] = {
+            "card": defaultdict(lambda: [0, 0]),
+            "tier": defaultdict(lambda: [0, 0]),
+            "day": defaultdict(lambda: [0, 0]),
+        }
+        # apr[tier] = [sum of rates, number of rates]
+        self._apr: Dict[str, list] = defaultdict(lambda: [0.0, 0])
+
+    def _add(self, application: Application):
+        approved = int(application.status == "approved")
+        for dimension, key in (
+            ("card", application.cardSlug),
+            ("tier", application.approvalTier),
+            ("day", application.applicationDate[:10]),
+        ):
+            bucket = self._counts[dimension][key]
+            bucket[0] += 1
+            bucket[1] += approved
+        if approved and application.interestRate is not None:
+            apr = self._apr[application.approvalTier]
+            apr[0] += application.interestRate
+            apr[1] += 1
+
+    def _ensure_loaded(self, repository: Repository):
+        if not self._loaded:
+            self._load()
+            self._loaded = True
+        self._catch_up(repository)
+
+    def _load(self):
+        """Restore the persisted aggregates and their watermark, if any"""
+        if not self.path.exists():
+            return
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        self._reset()
+        for dimension, buckets in data["counts"].items():
+            self._counts[dimension].update(buckets)
+        self._apr.update(data["apr"])
+        self._watermark = data.get("watermark")
+
+    def _catch_up(self, repository: Repository):
+        """Fold in the applications stored after the watermark, by any process"""
+        since = repository.applications_since(self._watermark)
+        if since is None:
+            current = repository.applications_watermark()
+            if current is not None and current == self._watermark:
+                return
+            # Cannot resume from the watermark: start over from the full history
+            self._reset()
+            self._watermark = None
+            since = repository.applications_since(None)
+            if since is None:
+                self.rebuild(repository.iter_applications(), current)
+                return
+        for watermark, application in since:
+            self._add(application)
+            self._watermark = watermark
+            self._unsaved += 1
+        if self._unsaved and time.monotonic() - self._persisted_at >= self.persist_interval:
+            self._persist(self._watermark)
+
+    def _persist(self, watermark: Optional[str]):
+        data = {"watermark": watermark, "counts": self._counts, "apr": self._apr}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+        self._watermark = watermark
+        self._unsaved = 0
+        self._persisted_at = time.monotonic()
+
+    def rebuild(self, applications: Iterable[Application], watermark: Optional[str] = None):
+        """Recompute every aggregate from the full application history"""
+        self._reset()
+        for application in applications:
+            self._add(application)
+        self._persist(watermark)
+
+    def record(self, watermark: Optional[str], repository: Repository):
+        """
+        Catch up with a newly stored application.
+
+        Called from the repository's `on_recorded` callback with the store's
+        watermark right after that application; applications other workers
+        stored before it are folded in too.
+        """
+        with self._lock:
+            if watermark is None or watermark != self._watermark:
+                self._ensure_loaded(repository)
+
+    def flush(self):
+        """Persist aggregates not yet written to disk"""
+        with self._lock:
+            if self._loaded and self._unsaved:
+                self._persist(self._watermark)
+
+    def snapshot(self, repository: Repository, days: int = 30) -> ApplicationStats:
+        """Current aggregates; cost depends on the number of buckets, not on history"""
+        with self._lock:
+            self._ensure_loaded(repository)
+            bucket = lambda counts: ApprovalBucket(
+                applications=counts[0],
+                approved=counts[1],
+                approvalRate=counts[1] / counts[0] if counts[0] else 0.0
+            )
+            total = [sum(c[0] for c in self._counts["card"].values()),
+                     sum(c[1] for c in self._counts["card"].values())]
+            recent_days = sorted(self._counts["day"])[-days:] if days > 0 else []
+            return ApplicationStats(
+                totalApplications=total[0],
+                approvalRate=bucket(total).approvalRate,
+                byCard={k: bucket(v) for k, v in self._counts["card"].items()},
+                byTier={k: bucket(v) for k, v in self._counts["tier"].items()},
+                byDay={day: bucket(self._counts["day"][day]) for day in recent_days},
+                averageAprByTier={k: round(v[0] / v[1], 2) if v[1] else None for k, v in self._apr.items()}
+            )
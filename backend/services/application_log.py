@@ -0,0 +1,249 @@
+import json, os, threading
+from typing import Dict, Iterator, List, Optional, Tuple
+from pathlib import Path
+from models.application import Application
+
+class ApplicationLog:
+    """
+    Append-only application store: one NDJSON record per application.
+
+    Each append is a single `write` on an O_APPEND descriptor (optionally
+    followed by fsync), so the cost no longer depends on history size. Full
+    segments can be rolled over to numbered archive files and `compact()`
+    folds every segment back into a single, de-duplicated log.
+
+    A userId -> [(segment, offset)] index is built on first use and then
+    extended incrementally, so a page of one user's history costs a seek per
+    record regardless of how large the log is.
+    """
+
+    def __init__(self, path: Path, fsync: bool = False):
+        self.path = path
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._repaired = False
+        self._user_index: Dict[str, List[Tuple[Path, int]]] = {}
+        self._indexed: Dict[Path, int] = {}
+        # Total bytes in archived segments; they only change on rollover and compact
+        self._archived_size: Optional[int] = None
+
+    def _segments(self) -> List[Path]:
+        """Archived segments oldest first, followed by the active log"""
+        archived = sorted(self.path.parent.glob(f"{self.path.stem}.*{self.path.suffix}"))
+        return archived + ([self.path] if self.path.exists() else [])
+
+    def _repair_tail(self):
+        """Truncate a torn trailing record left behind by a crash mid-write"""
+        if self._repaired or not self.path.exists():
+            self._repaired = True
+            return
+        with open(self.path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    f.seek(0)
+                    data = f.read()
+                    f.truncate(data.rfind(b"\n") + 1)
+        self._repaired = True
+
+    def append(self, application: Application) -> Tuple[int, int]:
+        """
+        Append one application. Returns its byte offset in the active log and
+        the log position right after it (bytes across all segments, as
+        `size()`), also when other processes append to the same log.
+        """
+        line = (application.model_dump_json() + "\n").encode()
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._repair_tail()
+            if self._archived_size is None:
+                self._archived_size = sum(segment.stat().st_size for segment in self._segments() if segment != self.path)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+                # O_APPEND writes land at the end even if another process appended first
+                end = os.lseek(fd, 0, os.SEEK_CUR)
+                offset = end - len(line)
+                if self.fsync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+            if self._indexed.get(self.path) == offset:
+                self._user_index.setdefault(application.userId, []).append((self.path, offset))
+                self._indexed[self.path] = offset + len(line)
+            return offset, self._archived_size + end
+
+    def _refresh_user_index(self):
+        """Index records appended since the last call; rebuild if segments were rewritten"""
+        segments = self._segments()
+        sizes = {segment: segment.stat().st_size for segment in segments}
+        if any(segment not in sizes or sizes[segment] < indexed for segment, indexed in self._indexed.items()):
+            self._user_index, self._indexed = {}, {}
+        for segment in segments:
+            start = self._indexed.get(segment, 0)
+            if sizes[segment] == start:
+                continue
+            with open(segment, 'rb') as f:
+                f.seek(start)
+                offset = start
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    if line.strip():
+                        user_id = json.loads(line)["userId"]
+                        self._user_index.setdefault(user_id, []).append((segment, offset))
+                    offset += len(line)
+            self._indexed[segment] = offset
+
+    def user_page(self, user_id: str, before: Optional[int], limit: int) -> Tuple[List[Application], Optional[int]]:
+        """
+        Return up to `limit` of a user's applications, newest first, that come
+        before position `before` in their history, plus the position to pass
+        for the next (older) page or None when exhausted.
+        """
+        with self._lock:
+            self._refresh_user_index()
+            entries = self._user_index.get(user_id, [])
+            end = len(entries) if before is None else max(0, min(before, len(entries)))
+            start = max(0, end - limit)
+            page = [self.read_at(segment, offset) for segment, offset in reversed(entries[start:end])]
+        return page, (start if start > 0 else None)
+
+    def size(self) -> int:
+        """Total bytes across all segments; grows with every append"""
+        return sum(segment.stat().st_size for segment in self._segments())
+
+    def iter_records(self) -> Iterator[Tuple[Path, int, dict]]:
+        """Stream (segment, offset, record) for every stored application"""
+        for segment in self._segments():
+            with open(segment, 'rb') as f:
+                offset = 0
+                for line in f:
+                    if line.endswith(b"\n") and line.strip():
+                        yield segment, offset, json.loads(line)
+                    offset += len(line)
+
+    def records_since(self, position: int) -> Optional[Iterator[Tuple[int, dict]]]:
+        """
+        Stream (position after the record, record) for every record stored
+        after log position `position`; None if that is not a record boundary
+        of the current segments (the log was compacted or replaced).
+        """
+        base, start = 0, None
+        segments = []
+        for segment in self._segments():
+            size = segment.stat().st_size
+            if start is None and position < base + size:
+                start = position - base
+            if start is not None:
+                segments.append((segment, base))
+            base += size
+        if start is None:
+            return iter(()) if position == base else None
+        first = segments[0][0]
+        if start:
+            with open(first, 'rb') as f:
+                f.seek(start - 1)
+                if f.read(1) != b"\n":
+                    return None
+
+        def records() -> Iterator[Tuple[int, dict]]:
+            for segment, segment_base in segments:
+                with open(segment, 'rb') as f:
+                    offset = start if segment == first else 0
+                    f.seek(offset)
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            break
+                        offset += len(line)
+                        if line.strip():
+                            yield segment_base + offset, json.loads(line)
+        return records()
+
+    def iter_applications(self) -> Iterator[Application]:
+        """Stream every stored application, oldest first"""
+        for _, _, record in self.iter_records():
+            yield Application(**record)
+
+    def build_index(self) -> Dict[str, Tuple[Path, int]]:
+        """Map application ID to the (segment, offset) of its latest record"""
+        return {record["id"]: (segment, offset) for segment, offset, record in self.iter_records()}
+
+    def read_at(self, segment: Path, offset: int) -> Application:
+        """Read the single record stored at a known offset"""
+        with open(segment, 'rb') as f:
+            f.seek(offset)
+            return Application(**json.loads(f.readline()))
+
+    def rollover(self) -> Optional[Path]:
+        """Archive the active log as the next numbered segment"""
+        with self._lock:
+            if not self.path.exists() or self.path.stat().st_size == 0:
+                return None
+            archived = sorted(self.path.parent.glob(f"{self.path.stem}.*{self.path.suffix}"))
+            number = int(archived[-1].suffixes[-2].lstrip('.')) + 1 if archived else 1
+            target = self.path.with_name(f"{self.path.stem}.{number:06d}{self.path.suffix}")
+            os.replace(self.path, target)
+            self._archived_size = None
+            return target
+
+    def compact(self) -> int:
+        """Fold all segments into one log, keeping the latest record per ID"""
+        with self._lock:
+            self._repair_tail()
+            segments = self._segments()
+            latest: Dict[str, dict] = {}
+            for segment in segments:
+                with open(segment, 'rb') as f:
+                    for line in f:
+                        if line.endswith(b"\n") and line.strip():
+                            record = json.loads(line)
+                            latest.pop(record["id"], None)
+                            latest[record["id"]] = record
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp, 'w') as f:
+                for record in latest.values():
+                    f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            for segment in segments:
+                if segment != self.path:
+                    segment.unlink()
+            self._archived_size = None
+            return len(latest)
+
+    def migrate_from_json(self, json_path: Path) -> int:
+        """One-time import of a legacy applications.json array into an empty log"""
+        with self._lock:
+            if self.path.exists() or not json_path.exists():
+                return 0
+            with open(json_path, 'r') as f:
+                applications = [Application(**app) for app in json.load(f)]
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp, 'w') as f:
+                for application in applications:
+                    f.write(application.model_dump_json() + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            return len(applications)
+
+
+if __name__ == "__main__":
+    import sys
+    from repositories.factory import APPLICATIONS_FILE, APPLICATIONS_LOG_FILE
+
+    log = ApplicationLog(APPLICATIONS_LOG_FILE)
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "migrate":
+        print(f"Migrated {log.migrate_from_json(APPLICATIONS_FILE)} applications")
+    elif command == "rollover":
+        print(f"Archived active log to {log.rollover()}")
+    elif command == "compact":
+        print(f"Compacted log to {log.compact()} applications")
+    else:
+        print("Usage: python -m services.application_log [migrate|rollover|compact]")
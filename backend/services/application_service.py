@@ -1,29 +1,39 @@
-import json, uuid, random
-from typing import Optional, List, Tuple, Literal
+import os, uuid, random
+from typing import Optional, Tuple, Literal
 from datetime import datetime
-from pathlib import Path
-from models.application import Application, ApplicationData, ApplicationResponse
+from models.application import Application, ApplicationData, ApplicationPage, ApplicationResponse, ApplicationStats
 from models.user import User
-from services.user_service import update_user
+from repositories.base import StaleUserError
+from repositories.factory import get_repository, STATS_FILE
+from services.analytics import ApplicationAnalytics
+from services.locks import StripedLock
+from services.storage_executor import run_storage
 from data.cardData import CARD_THRESHOLDS
 
-DATA_FILE = Path(__file__).parent.parent / "data" / "applications.json"
+# Applications for the same user are serialized; different users run in parallel
+_user_locks = StripedLock(int(os.getenv("USER_LOCK_STRIPES", "64")))
+MAX_STALE_RETRIES = 3
 
-def _load_applications() -> List[Application]:
-    """Load applications from JSON file"""
-    if not DATA_FILE.exists():
-        return []
-    with open(DATA_FILE, 'r') as f:
-        data = json.load(f)
-    return [Application(**app) for app in data]
+_analytics = ApplicationAnalytics.from_env(STATS_FILE)
 
-def _save_application(application: Application):
-    """Save new application to JSON file"""
-    applications = _load_applications()
-    applications.append(application)
-    DATA_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(DATA_FILE, 'w') as f:
-        json.dump([app.model_dump() for app in applications], f, indent=2)
+def _record_application(user: User, application: Application):
+    """Persist the updated applicant and the application record together"""
+    user.updatedAt = datetime.utcnow().isoformat()
+    repository = get_repository()
+    repository.record_application(
+        user,
+        application,
+        on_recorded=lambda watermark: _analytics.record(watermark, repository)
+    )
+
+def list_user_applications(user_id: str, cursor: Optional[str] = None, limit: int = 20) -> ApplicationPage:
+    """Page through a user's application history, newest first"""
+    applications, next_cursor = get_repository().list_user_applications(user_id, cursor, limit)
+    return ApplicationPage(applications=applications, nextCursor=next_cursor)
+
+def get_application_stats(days: int = 30) -> ApplicationStats:
+    """Approval aggregates maintained on every write (loaded or rebuilt on first use)"""
+    return _analytics.snapshot(get_repository(), days)
 
 def calculate_age(birth_date: str) -> int:
     """Calculate age from birth date (YYYY-MM-DD)"""
@@ -109,7 +119,27 @@ def process_application(
     user: User,
     card_slug: str
 ) -> ApplicationResponse:
-    """Process card application"""
+    """
+    Process card application under the applicant's lock stripe.
+
+    The user is re-read inside the lock so a duplicate application sees the
+    outcome of the one before it. If another process saved the user in the
+    meantime the version check fails and the decision is retried.
+    """
+    with _user_locks.lock_for(user.id):
+        for attempt in range(MAX_STALE_RETRIES):
+            current = get_repository().get_user_by_id(user.id) or user
+            try:
+                return _decide_application(current, card_slug)
+            except StaleUserError:
+                if attempt == MAX_STALE_RETRIES - 1:
+                    raise
+
+def _decide_application(
+    user: User,
+    card_slug: str
+) -> ApplicationResponse:
+    """Check eligibility, compute the tier and persist the outcome"""
 
     # Check eligibility
     eligible, message = check_eligibility(user, card_slug)
@@ -139,7 +169,6 @@ def process_application(
         user.rejectionDate = datetime.utcnow().isoformat()
         user.currentCard = None
         user.interestRate = None
-        update_user(user)
 
         # Save application record
         application = Application(
@@ -157,7 +186,7 @@ def process_application(
                 age=age
             )
         )
-        _save_application(application)
+        _record_application(user, application)
 
         return ApplicationResponse(
             success=False,
@@ -173,7 +202,6 @@ def process_application(
         user.currentCard = card_slug
         user.interestRate = interest_rate
         user.rejectionDate = None
-        update_user(user)
 
         # Save application record
         application = Application(
@@ -191,7 +219,7 @@ def process_application(
                 age=age
             )
         )
-        _save_application(application)
+        _record_application(user, application)
 
         return ApplicationResponse(
             success=True,
@@ -201,3 +229,18 @@ def process_application(
             message=f"Congratulations! You've been approved for the {card_slug.title()} card with an APR of {interest_rate}%.",
             rejectionDate=None
         )
+
+async def process_application_async(
+    user: User,
+    card_slug: str
+) -> ApplicationResponse:
+    """Process card application on the storage thread pool"""
+    return await run_storage(process_application, user, card_slug)
+
+async def get_application_stats_async(days: int = 30) -> ApplicationStats:
+    """Application stats without blocking the event loop"""
+    return await run_storage(get_application_stats, days)
+
+async def list_user_applications_async(user_id: str, cursor: Optional[str] = None, limit: int = 20) -> ApplicationPage:
+    """Application history page without blocking the event loop"""
+    return await run_storage(list_user_applications, user_id, cursor, limit)
@@ -1,27 +1,146 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from typing import Optional
-import os
+from typing import Dict, Optional, Set, Tuple
+import os, threading, time
 
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of verified token -> payload.
+
+    Entries expire at the token's `exp` claim, the whole cache is dropped when
+    the signing secret changes, and `purge_user` removes every entry for one
+    user so revocations take effect immediately.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.secret = SECRET_KEY
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[dict, float]]" = OrderedDict()
+        self._by_user: Dict[str, Set[str]] = {}
+        self._stats = {"hits": 0, "misses": 0, "expirations": 0, "evictions": 0, "purges": 0}
+
+    def _remove(self, token: str):
+        payload, _ = self._entries.pop(token)
+        tokens = self._by_user.get(payload.get("user_id"))
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[payload.get("user_id")]
+
+    def get(self, token: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            payload, expires_at = entry
+            if expires_at <= time.time():
+                self._remove(token)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(token)
+            self._stats["hits"] += 1
+            return payload
+
+    def put(self, token: str, payload: dict):
+        expires_at = payload.get("exp")
+        if self.max_size <= 0 or not isinstance(expires_at, (int, float)):
+            return
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = (payload, float(expires_at))
+            self._by_user.setdefault(payload.get("user_id"), set()).add(token)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def discard(self, token: str):
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+
+    def purge_user(self, user_id: str):
+        with self._lock:
+            for token in list(self._by_user.get(user_id, ())):
+                self._remove(token)
+                self._stats["purges"] += 1
+
+    def clear(self, secret: Optional[str] = None):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+            if secret is not None:
+                self.secret = secret
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats, size=len(self._entries), max_size=self.max_size)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_token_cache = VerifiedTokenCache(TOKEN_CACHE_SIZE)
+# user_id -> epoch seconds; tokens issued at or before this are rejected
+_revoked_before: Dict[str, float] = {}
 
 def create_access_token(data: dict) -> str:
     """Generate JWT token"""
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
-    to_encode.update({"exp": expire})
+    now = datetime.utcnow()
+    expire = now + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
+    # iat in milliseconds, the resolution revocations are compared at (a datetime would be truncated to seconds)
+    to_encode.update({"exp": expire, "iat": round(time.time(), 3)})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 def verify_token(token: str) -> Optional[dict]:
-    """Verify and decode JWT token"""
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except JWTError:
-        return None
+    """Verify and decode JWT token, served from the verified-token cache when possible"""
+    if _token_cache.secret != SECRET_KEY:
+        _token_cache.clear(SECRET_KEY)
+    payload = _token_cache.get(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return None
+        if _is_revoked(payload):
+            return None
+        _token_cache.put(token, payload)
+        # revoke_user_tokens may have purged the user between the check and the put
+        if _is_revoked(payload):
+            _token_cache.discard(token)
+            return None
+    return payload
+
+def _is_revoked(payload: dict) -> bool:
+    revoked_at = _revoked_before.get(payload.get("user_id"))
+    return revoked_at is not None and payload.get("iat", 0) <= revoked_at
+
+def revoke_user_tokens(user_id: str):
+    """Invalidate every token issued to a user so far"""
+    # Set before the purge, so a verification racing with it fails its re-check after caching
+    _revoked_before[user_id] = round(time.time(), 3)
+    _token_cache.purge_user(user_id)
+
+def rotate_secret(secret: str):
+    """Switch the signing secret; all previously issued tokens stop verifying"""
+    global SECRET_KEY
+    SECRET_KEY = secret
+    _token_cache.clear(secret)
+
+def get_token_cache_stats() -> dict:
+    """Hit/miss/eviction counters of the verified-token cache"""
+    return _token_cache.stats()
 
 def get_current_user_id(token: str) -> Optional[str]:
     """Extract user ID from token"""
@@ -0,0 +1,184 @@
+"""
+Threshold backtesting over the application history.
+
+Streams every stored application, re-scores its userData snapshot under one or
+more candidate threshold sets in a process pool, and reports per-card tier
+migration matrices (stored tier -> candidate tier) and approval-rate deltas.
+Only a bounded number of record chunks are in memory at any time.
+
+Usage: python -m services.backtest candidate.json [candidate2.json ...] [--workers 4] [--chunk-size 100000]
+
+Candidate files use the CARD_THRESHOLDS layout; cards, tiers and fields they
+omit keep their current thresholds. Applications for cards that are no longer in
+CARD_THRESHOLDS (retired or unknown slugs) are skipped and counted.
+"""
+import os
+import json
+import numpy as np
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from data.cardData import CARD_THRESHOLDS
+from models.application import Application
+from services.underwriting import TIERS, UNLIKELY, score_batch
+
+TIER_CODES = {name: code for code, name in enumerate(TIERS)}
+CARDS = list(CARD_THRESHOLDS)
+CARD_CODES = {card_slug: code for code, card_slug in enumerate(CARDS)}
+
+Columns = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+def _chunks(
+    applications: Iterable[Application],
+    chunk_size: int,
+    skipped: Optional[Dict[str, int]] = None
+) -> Iterator[Columns]:
+    """
+    Group applications into columnar chunks of at most chunk_size records,
+    counting applications for unknown cards in `skipped` by slug
+    """
+    rows = []
+    for app in applications:
+        card = CARD_CODES.get(app.cardSlug)
+        if card is None:
+            if skipped is not None:
+                skipped[app.cardSlug] = skipped.get(app.cardSlug, 0) + 1
+            continue
+        data = app.userData
+        rows.append((data.salary, data.netWorth, data.creditScore, data.age,
+                     card, TIER_CODES[app.approvalTier]))
+        if len(rows) == chunk_size:
+            yield _columns(rows)
+            rows = []
+    if rows:
+        yield _columns(rows)
+
+def _columns(rows: List[tuple]) -> Columns:
+    salary, net_worth, credit_score, age, card, tier = zip(*rows)
+    return (np.array(salary, dtype=np.float64), np.array(net_worth, dtype=np.float64),
+            np.array(credit_score, dtype=np.int64), np.array(age, dtype=np.int64),
+            np.array(card, dtype=np.int64), np.array(tier, dtype=np.int64))
+
+def _score_chunk(columns: Columns, candidates: List[Dict[str, dict]]) -> np.ndarray:
+    """Migration counts shaped (candidate, card, stored tier, candidate tier)"""
+    salary, net_worth, credit_score, age, card, stored = columns
+    counts = np.zeros((len(candidates), len(CARDS), len(TIERS), len(TIERS)), dtype=np.int64)
+    for c, thresholds in enumerate(candidates):
+        scored = score_batch(salary, net_worth, credit_score, age, thresholds)
+        for k, card_slug in enumerate(CARDS):
+            mask = card == k
+            np.add.at(counts[c, k], (stored[mask], scored[card_slug][mask]), 1)
+    return counts
+
+def _merge(candidate: Dict[str, dict]) -> Dict[str, dict]:
+    """Overlay a candidate on CARD_THRESHOLDS field by field; raises ValueError for unknown keys"""
+    unknown = sorted(set(candidate) - set(CARDS))
+    if unknown:
+        raise ValueError(f"Unknown cards: {', '.join(unknown)}")
+    merged = {}
+    for card_slug, tiers in CARD_THRESHOLDS.items():
+        overrides = candidate.get(card_slug, {})
+        unknown = sorted(set(overrides) - set(tiers))
+        if unknown:
+            raise ValueError(f"Unknown tiers for {card_slug}: {', '.join(unknown)}")
+        merged[card_slug] = {}
+        for tier, fields in tiers.items():
+            unknown = sorted(set(overrides.get(tier, {})) - set(fields))
+            if unknown:
+                raise ValueError(f"Unknown fields for {card_slug}.{tier}: {', '.join(unknown)}")
+            merged[card_slug][tier] = dict(fields, **overrides.get(tier, {}))
+    return merged
+
+def run_backtest(
+    applications: Iterable[Application],
+    candidates: List[Dict[str, dict]],
+    workers: Optional[int] = None,
+    chunk_size: int = 100_000,
+    skipped: Optional[Dict[str, int]] = None
+) -> np.ndarray:
+    """
+    Re-score the history under every candidate and return summed migration
+    counts. Applications for unknown cards are left out and, if `skipped` is
+    given, counted in it by card slug.
+    """
+    candidates = [_merge(candidate) for candidate in candidates]
+    total = np.zeros((len(candidates), len(CARDS), len(TIERS), len(TIERS)), dtype=np.int64)
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = set()
+        max_in_flight = 2 * workers
+        for columns in _chunks(applications, chunk_size, skipped):
+            in_flight.add(pool.submit(_score_chunk, columns, candidates))
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    total += future.result()
+        for future in in_flight:
+            total += future.result()
+    return total
+
+def summarize(counts: np.ndarray, names: List[str]) -> List[dict]:
+    """Turn migration counts into per-candidate, per-card reports"""
+    reports = []
+    for c, name in enumerate(names):
+        cards = {}
+        for k, card_slug in enumerate(CARDS):
+            matrix = counts[c, k]
+            records = int(matrix.sum())
+            stored_approved = int(matrix[:UNLIKELY].sum())
+            candidate_approved = int(matrix[:, :UNLIKELY].sum())
+            stored_rate = stored_approved / records if records else 0.0
+            candidate_rate = candidate_approved / records if records else 0.0
+            cards[card_slug] = {
+                "records": records,
+                "migration": {
+                    str(TIERS[i]): {str(TIERS[j]): int(matrix[i, j]) for j in range(len(TIERS))}
+                    for i in range(len(TIERS))
+                },
+                "storedApprovalRate": stored_rate,
+                "candidateApprovalRate": candidate_rate,
+                "approvalRateDelta": candidate_rate - stored_rate,
+            }
+        reports.append({"candidate": name, "cards": cards})
+    return reports
+
+def print_report(reports: List[dict]):
+    header = "stored \\ candidate"
+    for report in reports:
+        print(f"\n=== {report['candidate']} ===")
+        for card_slug, card in report["cards"].items():
+            print(f"\n{card_slug}: {card['records']} records, approval rate "
+                  f"{card['storedApprovalRate']:.2%} -> {card['candidateApprovalRate']:.2%} "
+                  f"({card['approvalRateDelta']:+.2%})")
+            print(f"  {header:>20s}" + "".join(f"{str(t):>18s}" for t in TIERS))
+            for stored, row in card["migration"].items():
+                print(f"  {stored:>20s}" + "".join(f"{n:>18d}" for n in row.values()))
+
+
+if __name__ == "__main__":
+    import argparse, sys
+    from repositories.factory import get_repository
+
+    parser = argparse.ArgumentParser(description="Backtest candidate card thresholds")
+    parser.add_argument("candidates", nargs="+", help="JSON files in the CARD_THRESHOLDS layout")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    candidates = []
+    for path in args.candidates:
+        with open(path, 'r') as f:
+            candidates.append(json.load(f))
+        try:
+            _merge(candidates[-1])
+        except ValueError as e:
+            sys.exit(f"{path}: {e}")
+    skipped: Dict[str, int] = {}
+    counts = run_backtest(get_repository().iter_applications(), candidates, args.workers, args.chunk_size, skipped)
+    reports = summarize(counts, args.candidates)
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        print_report(reports)
+    if skipped:
+        print(f"\nSkipped {sum(skipped.values())} applications for unknown cards: {skipped}", file=sys.stderr)
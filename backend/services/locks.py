@@ -0,0 +1,17 @@
+import threading
+from typing import List
+
+class StripedLock:
+    """
+    Fixed pool of locks selected by key hash.
+
+    Work for the same key is serialized while different keys usually land on
+    different stripes and proceed in parallel, without keeping a lock per key.
+    """
+
+    def __init__(self, stripes: int = 64):
+        self._locks: List[threading.Lock] = [threading.Lock() for _ in range(stripes)]
+
+    def lock_for(self, key: str) -> threading.Lock:
+        """Return the lock guarding key"""
+        return self._locks[hash(key) % len(self._locks)]
@@ -0,0 +1,33 @@
+import asyncio, functools, os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+STORAGE_WORKERS = int(os.getenv("STORAGE_WORKERS", "4"))
+STORAGE_MAX_PENDING = int(os.getenv("STORAGE_MAX_PENDING", "64"))
+
+_executor = ThreadPoolExecutor(max_workers=STORAGE_WORKERS, thread_name_prefix="storage")
+_pending: Optional[asyncio.Semaphore] = None
+_stats = {"calls": 0, "in_flight": 0}
+
+async def run_storage(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run blocking storage I/O on the bounded storage thread pool.
+
+    At most STORAGE_MAX_PENDING calls are queued or running at once; further
+    callers wait on the event loop instead of growing the executor queue.
+    """
+    global _pending
+    if _pending is None:
+        _pending = asyncio.Semaphore(STORAGE_MAX_PENDING)
+    _stats["calls"] += 1
+    _stats["in_flight"] += 1
+    try:
+        async with _pending:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+    finally:
+        _stats["in_flight"] -= 1
+
+def storage_stats() -> dict:
+    """Storage calls made so far and those queued or running now"""
+    return dict(_stats, workers=STORAGE_WORKERS, max_pending=STORAGE_MAX_PENDING)
@@ -0,0 +1,111 @@
+"""
+Vectorized underwriting over CARD_THRESHOLDS.
+
+Scores whole columns of applicants per card in one NumPy pass. Results match
+application_service.calculate_approval_tier / calculate_age exactly.
+"""
+import json
+import numpy as np
+from datetime import datetime
+from typing import Annotated, Dict, Optional, Sequence
+from pydantic import TypeAdapter, ValidationError
+from data.cardData import CARD_THRESHOLDS
+from models.user import User
+
+# Credit scores are validated like User.creditScore on the scalar path: whole numbers in range, never truncated
+CREDIT_SCORE = TypeAdapter(Annotated[int, User.model_fields["creditScore"]])
+
+# Tier codes returned by score_batch index into TIERS
+TIERS = np.array(["Highly Qualified", "Likely", "Unlikely"], dtype=object)
+HIGHLY_QUALIFIED, LIKELY, UNLIKELY = 0, 1, 2
+
+def ages_from_birth_dates(birth_dates: Sequence[str], today: Optional[datetime] = None) -> np.ndarray:
+    """Vectorized calculate_age for YYYY-MM-DD birth dates"""
+    today = today or datetime.utcnow()
+    days = np.asarray(birth_dates, dtype="datetime64[D]")
+    years = days.astype("datetime64[Y]")
+    months = days.astype("datetime64[M]")
+    birth_year = years.astype(np.int64) + 1970
+    birth_month = (months - years).astype(np.int64) + 1
+    birth_day = (days - months).astype(np.int64) + 1
+    before_birthday = (today.month < birth_month) | ((today.month == birth_month) & (today.day < birth_day))
+    return today.year - birth_year - before_birthday.astype(np.int64)
+
+def score_batch(
+    salary: np.ndarray,
+    net_worth: np.ndarray,
+    credit_score: np.ndarray,
+    age: np.ndarray,
+    thresholds: Dict[str, dict] = CARD_THRESHOLDS
+) -> Dict[str, np.ndarray]:
+    """Return an array of tier codes (see TIERS) per card slug"""
+    salary = np.asarray(salary, dtype=np.float64)
+    net_worth = np.asarray(net_worth, dtype=np.float64)
+    credit_score = np.asarray(credit_score, dtype=np.int64)
+    age = np.asarray(age, dtype=np.int64)
+
+    def meets(level: dict) -> np.ndarray:
+        return ((salary >= level["minSalary"]) &
+                (net_worth >= level["minNetWorth"]) &
+                (age >= level["minAge"]) &
+                (credit_score >= level["minFico"]))
+
+    results = {}
+    for card_slug, card in thresholds.items():
+        codes = np.full(salary.shape, UNLIKELY, dtype=np.int8)
+        codes[meets(card["likely"])] = LIKELY
+        codes[meets(card["highlyQualified"])] = HIGHLY_QUALIFIED
+        results[card_slug] = codes
+    return results
+
+def prequalify_batch(
+    salary: Sequence[float],
+    net_worth: Sequence[float],
+    credit_score: Sequence[int],
+    birth_date: Sequence[str],
+    thresholds: Dict[str, dict] = CARD_THRESHOLDS
+) -> Dict[str, np.ndarray]:
+    """Return an array of tier names per card slug for columnar applicant data"""
+    age = ages_from_birth_dates(birth_date)
+    codes = score_batch(salary, net_worth, credit_score, age, thresholds)
+    return {card_slug: TIERS[tier_codes] for card_slug, tier_codes in codes.items()}
+
+def prequalify_ndjson(lines: Sequence[bytes], first_line: int = 1) -> bytes:
+    """
+    Score a batch of NDJSON applicant records.
+
+    Each record needs salary, netWorth, creditScore and birthDate (YYYY-MM-DD)
+    and may carry an id that is echoed back. Output is one NDJSON line per
+    non-blank input line: the tier per card, or an error for that line. A
+    credit score a User would reject (fractional or outside 300-850) is an
+    error rather than being truncated.
+    """
+    rows, outputs = [], []
+    for offset, line in enumerate(lines):
+        if not line.strip():
+            continue
+        line_number = first_line + offset
+        try:
+            record = json.loads(line)
+            row = (
+                float(record["salary"]),
+                float(record["netWorth"]),
+                CREDIT_SCORE.validate_python(record["creditScore"]),
+                str(np.datetime64(record["birthDate"], "D"))
+            )
+        except ValidationError as e:
+            outputs.append({"line": line_number, "error": f"Invalid record: creditScore: {e.errors()[0]['msg']}"})
+            continue
+        except (ValueError, TypeError, KeyError) as e:
+            outputs.append({"line": line_number, "error": f"Invalid record: {e}"})
+            continue
+        outputs.append({"id": record.get("id", line_number)})
+        rows.append((len(outputs) - 1, row))
+
+    if rows:
+        salary, net_worth, credit_score, birth_date = zip(*(row for _, row in rows))
+        tiers = prequalify_batch(salary, net_worth, credit_score, birth_date)
+        for i, (index, _) in enumerate(rows):
+            outputs[index]["tiers"] = {card_slug: str(names[i]) for card_slug, names in tiers.items()}
+
+    return "".join(json.dumps(output) + "\n" for output in outputs).encode()
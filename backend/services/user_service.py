@@ -1,34 +1,20 @@
-import json
-from typing import Optional, List
+from typing import Optional
 from datetime import datetime
-from pathlib import Path
 from models.user import User, UserResponse
+from repositories.factory import get_repository
+from services.storage_executor import run_storage
 
-DATA_FILE = Path(__file__).parent.parent / "data" / "users.json"
-
-def _load_users() -> List[User]:
-    """Load users from JSON file"""
-    if not DATA_FILE.exists():
-        return []
-    with open(DATA_FILE, 'r') as f:
-        data = json.load(f)
-    return [User(**user) for user in data]
-
-def _save_users(users: List[User]):
-    """Save users to JSON file"""
-    DATA_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(DATA_FILE, 'w') as f:
-        json.dump([user.model_dump() for user in users], f, indent=2)
+def reload_users():
+    """Force a re-read of the user store (e.g. after a bulk import)"""
+    get_repository().reload()
 
 def get_user_by_username(username: str) -> Optional[User]:
     """Find user by username"""
-    users = _load_users()
-    return next((u for u in users if u.username == username), None)
+    return get_repository().get_user_by_username(username)
 
 def get_user_by_id(user_id: str) -> Optional[User]:
     """Find user by ID"""
-    users = _load_users()
-    return next((u for u in users if u.id == user_id), None)
+    return get_repository().get_user_by_id(user_id)
 
 def authenticate_user(username: str, password: str) -> Optional[User]:
     """Authenticate user with username and password"""
@@ -37,13 +23,18 @@ def authenticate_user(username: str, password: str) -> Optional[User]:
         return user
     return None
 
-def update_user(user: User) -> User:
-    """Update user data"""
-    users = _load_users()
+def update_user(user: User, wait: bool = False) -> User:
+    """Update user data; wait=True blocks until the change is durable"""
     user.updatedAt = datetime.utcnow().isoformat()
-    users = [u if u.id != user.id else user for u in users]
-    _save_users(users)
-    return user
+    return get_repository().save_user(user, wait=wait)
+
+async def get_user_by_id_async(user_id: str) -> Optional[User]:
+    """Find user by ID without blocking the event loop"""
+    return await run_storage(get_user_by_id, user_id)
+
+async def authenticate_user_async(username: str, password: str) -> Optional[User]:
+    """Authenticate user without blocking the event loop"""
+    return await run_storage(authenticate_user, username, password)
 
 def to_user_response(user: User) -> UserResponse:
     """Convert User to UserResponse (removing password)"""
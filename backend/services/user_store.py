@@ -0,0 +1,232 @@
+import atexit, json, os, threading, time
+from typing import Dict, List, Optional, Set, Tuple
+from pathlib import Path
+from models.user import User
+from repositories.base import StaleUserError
+
+class UserStore:
+    """
+    Process-wide user repository backed by a JSON file.
+
+    The file is parsed once and kept in memory with hash indexes by id and
+    username. Outside edits are picked up by comparing the file's inode, size
+    and mtime before each access; `reload()` forces a re-read. Callers always
+    receive copies so mutating a returned user never touches the index.
+
+    With a positive `flush_window` (seconds) writes are group-committed: saves
+    update the indexes immediately, and a background thread coalesces every
+    user dirtied within the window into one atomic rewrite (temp file +
+    rename). Pass `wait=True` to `save()` to block until the change is on disk.
+    If a rewrite fails its users stay dirty, the flusher retries with backoff,
+    and callers waiting for those changes get the error.
+    """
+
+    MAX_RETRY_DELAY = 5.0
+
+    def __init__(self, path: Path, flush_window: float = 0.0):
+        self.path = path
+        self.flush_window = flush_window
+        self._lock = threading.RLock()
+        self._flushed = threading.Condition(self._lock)
+        self._write_lock = threading.Lock()
+        self._by_id: Dict[str, User] = {}
+        self._by_username: Dict[str, User] = {}
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._loaded = False
+        self._dirty: Set[str] = set()
+        self._dirty_since: Optional[float] = None
+        self._generation = 0
+        self._flushed_generation = 0
+        self._failed_generation = 0
+        self._write_error: Optional[BaseException] = None
+        self._flusher: Optional[threading.Thread] = None
+        self._metrics = {
+            "flush_count": 0,
+            "users_flushed": 0,
+            "saves": 0,
+            "last_batch_size": 0,
+            "max_batch_size": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "last_commit_latency_ms": 0.0,
+            "max_commit_latency_ms": 0.0,
+            "write_errors": 0,
+        }
+
+    def _file_signature(self) -> Optional[Tuple[int, int, int]]:
+        """Identify the current file version by (inode, size, mtime)"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _refresh(self):
+        """Reload the indexes if the file changed since we last saw it"""
+        if self._dirty:
+            # Unflushed saves are newer than anything on disk
+            return
+        signature = self._file_signature()
+        if self._loaded and signature == self._signature:
+            return
+        users: List[User] = []
+        if signature is not None:
+            with open(self.path, 'r') as f:
+                users = [User(**user) for user in json.load(f)]
+        self._by_id = {u.id: u for u in users}
+        self._by_username = {u.username: u for u in users}
+        self._signature = signature
+        self._loaded = True
+
+    def _write(self):
+        """Atomically persist a snapshot of every user in index order"""
+        with self._write_lock:
+            with self._lock:
+                snapshot = [u.model_dump() for u in self._by_id.values()]
+                generation = self._generation
+                batch = set(self._dirty)
+                dirty_since = self._dirty_since
+                self._dirty.clear()
+                self._dirty_since = None
+            started = time.perf_counter()
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+                with open(tmp, 'w') as f:
+                    json.dump(snapshot, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+            except BaseException as e:
+                with self._lock:
+                    # Still not on disk: keep the users dirty and fail whoever waits for them
+                    self._dirty |= batch
+                    if dirty_since is not None:
+                        self._dirty_since = min(self._dirty_since or dirty_since, dirty_since)
+                    self._failed_generation = max(self._failed_generation, generation)
+                    self._write_error = e
+                    self._metrics["write_errors"] += 1
+                    self._flushed.notify_all()
+                raise
+            finished = time.perf_counter()
+            with self._lock:
+                self._signature = self._file_signature()
+                self._flushed_generation = max(self._flushed_generation, generation)
+                self._write_error = None
+                self._record_flush(len(batch), finished - started, finished - (dirty_since or started))
+                self._flushed.notify_all()
+
+    def _record_flush(self, batch: int, duration: float, latency: float):
+        m = self._metrics
+        m["flush_count"] += 1
+        m["users_flushed"] += batch
+        m["last_batch_size"] = batch
+        m["max_batch_size"] = max(m["max_batch_size"], batch)
+        m["last_flush_ms"] = duration * 1000
+        m["max_flush_ms"] = max(m["max_flush_ms"], duration * 1000)
+        m["last_commit_latency_ms"] = latency * 1000
+        m["max_commit_latency_ms"] = max(m["max_commit_latency_ms"], latency * 1000)
+
+    def _wait_flushed(self, target: int):
+        """Block until generation `target` is on disk; raises the write error if it failed. Call with _lock held"""
+        while self._flushed_generation < target:
+            if self._write_error is not None and self._failed_generation >= target:
+                raise self._write_error
+            self._flushed.wait()
+
+    def _flush_loop(self):
+        """Background group-commit loop; failed writes are retried with exponential backoff"""
+        delay = self.flush_window
+        while True:
+            with self._lock:
+                while not self._dirty:
+                    self._flushed.wait()
+            time.sleep(delay)
+            try:
+                self._write()
+                delay = self.flush_window
+            except Exception as e:
+                print(f"User store flush to {self.path} failed, retrying: {e!r}")
+                delay = min(max(delay * 2, 0.1), self.MAX_RETRY_DELAY)
+
+    def _ensure_flusher(self):
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="user-store-flush", daemon=True)
+            self._flusher.start()
+            atexit.register(self.flush)
+
+    def reload(self):
+        """Flush pending writes, drop the in-memory indexes and re-read the file"""
+        self.flush()
+        with self._lock:
+            self._loaded = False
+            self._refresh()
+
+    def flush(self):
+        """Write any pending changes now and wait until they are durable"""
+        with self._lock:
+            target = self._generation
+            pending = bool(self._dirty)
+        if pending:
+            self._write()
+        # A write already in progress has cleared _dirty before reaching disk
+        with self._lock:
+            self._wait_flushed(target)
+
+    def metrics(self) -> dict:
+        """Group-commit counters: flushes, batch sizes and latencies"""
+        with self._lock:
+            m = dict(self._metrics)
+            m["pending"] = len(self._dirty)
+            m["avg_batch_size"] = m["users_flushed"] / m["flush_count"] if m["flush_count"] else 0.0
+            return m
+
+    def get_by_id(self, user_id: str) -> Optional[User]:
+        """O(1) lookup by user ID"""
+        with self._lock:
+            self._refresh()
+            user = self._by_id.get(user_id)
+            return user.model_copy(deep=True) if user else None
+
+    def get_by_username(self, username: str) -> Optional[User]:
+        """O(1) lookup by username"""
+        with self._lock:
+            self._refresh()
+            user = self._by_username.get(username)
+            return user.model_copy(deep=True) if user else None
+
+    def all(self) -> List[User]:
+        """Return copies of every user in file order"""
+        with self._lock:
+            self._refresh()
+            return [u.model_copy(deep=True) for u in self._by_id.values()]
+
+    def save(self, user: User, wait: bool = False) -> User:
+        """Update an existing user in place and persist it (group-committed if enabled)"""
+        with self._lock:
+            self._refresh()
+            previous = self._by_id.get(user.id)
+            if previous is None:
+                return user
+            if previous.version != user.version:
+                raise StaleUserError(f"User {user.id} was modified concurrently")
+            user.version += 1
+            stored = user.model_copy(deep=True)
+            if previous.username != stored.username:
+                self._by_username.pop(previous.username, None)
+            self._by_id[stored.id] = stored
+            self._by_username[stored.username] = stored
+            self._metrics["saves"] += 1
+            self._generation += 1
+            target = self._generation
+            if not self._dirty:
+                self._dirty_since = time.perf_counter()
+            self._dirty.add(stored.id)
+            if self.flush_window > 0:
+                self._ensure_flusher()
+                self._flushed.notify_all()
+                if wait:
+                    self._wait_flushed(target)
+                return user
+        self._write()
+        return user
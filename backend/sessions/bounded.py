@@ -0,0 +1,188 @@
+"""
+Bounded in-memory session store for the chat agent.
+
+`InMemorySessionService` keeps every session and its full event history for
+the life of the process, and the frontend creates a new session per browser
+tab. `BoundedSessionService` keeps the same behaviour but tracks each
+session's last access and an estimate of its size, and evicts:
+- sessions idle for longer than `idle_ttl` seconds
+- the least recently used sessions beyond `max_sessions`
+- the least recently used sessions while the total estimate exceeds `max_bytes`
+
+Sizes are estimated from the JSON form of the initial state and of each
+stored event, which tracks what the session actually holds closely enough
+for budgeting without walking the object graph.
+
+Eviction removes sessions from InMemorySessionService's own `sessions` and
+`user_state` maps, which are not part of the public BaseSessionService API;
+requirements.txt pins google-adk to the version this was written against.
+"""
+import json, os, time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from google.adk.events.event import Event
+from google.adk.sessions import InMemorySessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+
+from sessions.get_or_create import GetOrCreateMixin
+
+SessionKey = Tuple[str, str, str]  # (app_name, user_id, session_id)
+
+class _Entry:
+    __slots__ = ("created", "last_access", "bytes")
+
+    def __init__(self, now: float, size: int):
+        self.created = now
+        self.last_access = now
+        self.bytes = size
+
+class BoundedSessionService(GetOrCreateMixin, InMemorySessionService):
+    def __init__(self, max_sessions: int = 1000, idle_ttl: float = 3600.0, max_bytes: int = 0):
+        super().__init__()
+        # Lookups are already in-process dict hits, so no known-id cache that eviction would have to invalidate
+        self._init_get_or_create(known_max=0)
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes  # 0 disables the byte budget
+        # Least recently used first
+        self._entries: "OrderedDict[SessionKey, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._evictions = {"idle": 0, "capacity": 0, "bytes": 0}
+
+    @classmethod
+    def from_env(cls) -> "BoundedSessionService":
+        """Build the store from SESSION_MAX_COUNT, SESSION_IDLE_TTL_SECONDS and SESSION_MAX_BYTES"""
+        return cls(
+            max_sessions=int(os.getenv("SESSION_MAX_COUNT", "1000")),
+            idle_ttl=float(os.getenv("SESSION_IDLE_TTL_SECONDS", "3600")),
+            max_bytes=int(os.getenv("SESSION_MAX_BYTES", "0"))
+        )
+
+    @staticmethod
+    def _key(app_name: str, user_id: str, session_id: str) -> SessionKey:
+        return (app_name, user_id, session_id.strip() if session_id else session_id)
+
+    def _drop(self, key: SessionKey):
+        """Remove a session and any per-user maps it leaves empty"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.bytes
+        app_name, user_id, session_id = key
+        user_sessions = self.sessions.get(app_name, {}).get(user_id)
+        if user_sessions is None:
+            return
+        user_sessions.pop(session_id, None)
+        if not user_sessions:
+            # Chat sessions use the session id as user id, so user state goes with them
+            del self.sessions[app_name][user_id]
+            self.user_state.get(app_name, {}).pop(user_id, None)
+
+    def _evict(self, keep: Optional[SessionKey] = None):
+        """Apply the idle TTL, count and byte limits, never evicting `keep`"""
+        now = time.monotonic()
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if key == keep:
+                break
+            if self.idle_ttl > 0 and now - entry.last_access > self.idle_ttl:
+                reason = "idle"
+            elif len(self._entries) > self.max_sessions > 0:
+                reason = "capacity"
+            elif self.max_bytes > 0 and self._bytes > self.max_bytes:
+                reason = "bytes"
+            else:
+                break
+            self._drop(key)
+            self._evictions[reason] += 1
+
+    def _expire_if_idle(self, key: SessionKey) -> bool:
+        """Evict the session if it has been idle past the TTL; True if it was"""
+        entry = self._entries.get(key)
+        if entry is None or self.idle_ttl <= 0 or time.monotonic() - entry.last_access <= self.idle_ttl:
+            return False
+        self._drop(key)
+        self._evictions["idle"] += 1
+        return True
+
+    def _touch(self, key: SessionKey) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.last_access = time.monotonic()
+            self._entries.move_to_end(key)
+        return entry
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session = await super().create_session(app_name=app_name, user_id=user_id, state=state, session_id=session_id)
+        key = self._key(app_name, user_id, session.id)
+        size = len(json.dumps(state, default=str)) if state else 0
+        self._entries[key] = _Entry(time.monotonic(), size)
+        self._bytes += size
+        self._evict(keep=key)
+        return session
+
+    async def _get_or_create(self, key: SessionKey) -> bool:
+        # No await between the check and the insert, so this is atomic on the event loop
+        if not self._expire_if_idle(key) and self._touch(key) is not None:
+            return False
+        await self.create_session(app_name=key[0], user_id=key[1], session_id=key[2])
+        return True
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        key = self._key(app_name, user_id, session_id)
+        if self._expire_if_idle(key):
+            return None
+        self._touch(key)
+        return await super().get_session(app_name=app_name, user_id=user_id, session_id=session_id, config=config)
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        self._evict()
+        return await super().list_sessions(app_name=app_name, user_id=user_id)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await super().delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+        self._drop(self._key(app_name, user_id, session_id))
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        stored = len(session.events)
+        event = await super().append_event(session=session, event=event)
+        key = self._key(session.app_name, session.user_id, session.id)
+        entry = self._touch(key)
+        if entry is not None and len(session.events) > stored:
+            size = len(event.model_dump_json(exclude_none=True))
+            entry.bytes += size
+            self._bytes += size
+            self._evict(keep=key)
+        return event
+
+    async def summary(self) -> dict:
+        """Session count, estimated bytes, age of the oldest sessions and eviction counts"""
+        self._evict()
+        now = time.monotonic()
+        oldest_idle = now - next(iter(self._entries.values())).last_access if self._entries else 0.0
+        oldest_age = now - min(e.created for e in self._entries.values()) if self._entries else 0.0
+        return {
+            "sessions": len(self._entries),
+            "bytes": self._bytes,
+            "oldest_idle_seconds": round(oldest_idle, 3),
+            "oldest_age_seconds": round(oldest_age, 3),
+            "max_sessions": self.max_sessions,
+            "idle_ttl_seconds": self.idle_ttl,
+            "max_bytes": self.max_bytes,
+            "evictions": dict(self._evictions),
+            "get_or_create": self.get_or_create_stats(),
+        }
@@ -0,0 +1,22 @@
+import os
+from typing import Optional
+from pathlib import Path
+from google.adk.sessions import BaseSessionService
+from repositories.factory import DATA_DIR
+
+SESSION_SQLITE_FILE = Path(os.getenv("SESSION_SQLITE_PATH", DATA_DIR / "sessions.db"))
+
+def create_session_service(backend: Optional[str] = None) -> BaseSessionService:
+    """Build the chat session store selected by SESSION_BACKEND ("memory" or "sqlite")"""
+    backend = backend or os.getenv("SESSION_BACKEND", "memory")
+    if backend == "sqlite":
+        from sessions.sqlite import SqliteSessionService
+        return SqliteSessionService(
+            SESSION_SQLITE_FILE,
+            cache_sessions=int(os.getenv("SESSION_CACHE_COUNT", "256")),
+            known_ids=int(os.getenv("SESSION_KNOWN_IDS", "4096"))
+        )
+    if backend == "memory":
+        from sessions.bounded import BoundedSessionService
+        return BoundedSessionService.from_env()
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
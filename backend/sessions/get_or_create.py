@@ -0,0 +1,76 @@
+"""
+Atomic get-or-create for chat sessions.
+
+Every chat turn has to make sure its session exists. Doing that as
+`get_session` followed by `create_session` costs two store round trips and
+lets two concurrent first messages race to create the same id.
+`GetOrCreateMixin.get_or_create_session` instead:
+- answers from a small LRU of session ids known to exist, without touching
+  the store, for warm sessions
+- lets only one caller per id run the store operation at a time; concurrent
+  callers for the same id wait for that result instead of issuing their own
+- relies on the store's `_get_or_create`, which checks and creates in one
+  atomic step
+"""
+import asyncio
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+SessionKey = Tuple[str, str, str]  # (app_name, user_id, session_id)
+
+class GetOrCreateMixin(ABC):
+    def _init_get_or_create(self, known_max: int):
+        self.known_max = known_max  # 0 disables the known-id cache
+        self._known: "OrderedDict[SessionKey, None]" = OrderedDict()
+        self._inflight: Dict[SessionKey, asyncio.Future] = {}
+        self._get_or_create_stats = {"known_hits": 0, "lookups": 0, "created": 0, "coalesced": 0}
+
+    @abstractmethod
+    async def _get_or_create(self, key: SessionKey) -> bool:
+        """Create the session unless it exists, atomically; True if it was created"""
+
+    def _forget(self, key: SessionKey):
+        """Drop a session id from the known-id cache once the session is gone"""
+        self._known.pop(key, None)
+
+    def _remember(self, key: SessionKey):
+        if self.known_max <= 0:
+            return
+        self._known[key] = None
+        self._known.move_to_end(key)
+        while len(self._known) > self.known_max:
+            self._known.popitem(last=False)
+
+    async def get_or_create_session(self, *, app_name: str, user_id: str, session_id: str) -> bool:
+        """Make sure the session exists; True only for the caller that created it"""
+        key = (app_name, user_id, session_id.strip())
+        stats = self._get_or_create_stats
+        while True:
+            if key in self._known:
+                self._known.move_to_end(key)
+                stats["known_hits"] += 1
+                return False
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            stats["coalesced"] += 1
+            # None means the leading call failed; try again ourselves
+            if await asyncio.shield(pending) is not None:
+                return False
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        created = None
+        try:
+            stats["lookups"] += 1
+            created = await self._get_or_create(key)
+        finally:
+            del self._inflight[key]
+            future.set_result(created)
+        stats["created"] += created
+        self._remember(key)
+        return created
+
+    def get_or_create_stats(self) -> dict:
+        return dict(self._get_or_create_stats, known_ids=len(self._known), known_max=self.known_max)
@@ -0,0 +1,373 @@
+"""
+SQLite-backed chat session store shared by every API worker.
+
+Sessions, their events and app/user scoped state live in one WAL-mode
+database, so any worker process can continue any conversation. Rehydration
+is lazy and incremental:
+- `get_or_create_session`, which the chat endpoint uses before each turn,
+  is a single INSERT OR IGNORE and is skipped for session ids this worker
+  already knows exist; `GetSessionConfig(num_recent_events=0)` reads only the
+  session row and state
+- otherwise each worker keeps the decoded events of recently used sessions
+  and only fetches events appended after the last one it has seen
+
+Database work runs on the shared storage thread pool. A turn that appends to
+a session another worker has updated since it was loaded fails with
+StaleSessionError instead of overwriting that worker's state.
+"""
+import json, sqlite3, threading, time, uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from google.adk.errors import StaleSessionError
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.errors.session_not_found_error import SessionNotFoundError
+from google.adk.events.event import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.state import State
+
+from services.storage_executor import run_storage
+from sessions.get_or_create import GetOrCreateMixin
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    create_time REAL NOT NULL,
+    update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_session ON events (app_name, user_id, session_id, seq);
+CREATE TABLE IF NOT EXISTS app_states (
+    app_name TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_states (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id)
+);
+"""
+
+SessionKey = Tuple[str, str, str]  # (app_name, user_id, session_id)
+
+def _split_state(state: Optional[Dict[str, Any]]) -> Tuple[dict, dict, dict]:
+    """Split a state delta into (app, user, session) parts, dropping temp keys"""
+    app, user, session = {}, {}, {}
+    for key, value in (state or {}).items():
+        if key.startswith(State.APP_PREFIX):
+            app[key[len(State.APP_PREFIX):]] = value
+        elif key.startswith(State.USER_PREFIX):
+            user[key[len(State.USER_PREFIX):]] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            session[key] = value
+    return app, user, session
+
+def _merge_state(session_state: dict, app_state: dict, user_state: dict) -> dict:
+    state = dict(session_state)
+    state.update({State.APP_PREFIX + k: v for k, v in app_state.items()})
+    state.update({State.USER_PREFIX + k: v for k, v in user_state.items()})
+    return state
+
+def _dumps(state: dict) -> str:
+    return json.dumps(state, default=str)
+
+class SqliteSessionService(GetOrCreateMixin, BaseSessionService):
+    def __init__(self, path: Path, cache_sessions: int = 256, known_ids: int = 4096):
+        self.path = path
+        self.cache_sessions = cache_sessions
+        self._local = threading.local()
+        # Decoded events of recently used sessions: key -> (last seq, events); touched on the event loop only
+        self._cache: "OrderedDict[SessionKey, Tuple[int, List[Event]]]" = OrderedDict()
+        self._stats = {"cache_hits": 0, "cache_misses": 0, "events_loaded": 0}
+        # Sessions are only removed through delete_session, which forgets the id on this worker
+        self._init_get_or_create(known_max=known_ids)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self, mode: str = "IMMEDIATE") -> Iterator[sqlite3.Connection]:
+        """Run a transaction; IMMEDIATE takes the write lock up front, DEFERRED gives a read snapshot"""
+        conn = self._conn()
+        conn.execute(f"BEGIN {mode}")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _scoped_state(conn: sqlite3.Connection, app_name: str, user_id: str) -> Tuple[dict, dict]:
+        app_row = conn.execute("SELECT state FROM app_states WHERE app_name = ?", (app_name,)).fetchone()
+        user_row = conn.execute(
+            "SELECT state FROM user_states WHERE app_name = ? AND user_id = ?", (app_name, user_id)
+        ).fetchone()
+        return json.loads(app_row[0]) if app_row else {}, json.loads(user_row[0]) if user_row else {}
+
+    @staticmethod
+    def _update_scoped_state(conn: sqlite3.Connection, app_name: str, user_id: str, app_delta: dict, user_delta: dict):
+        app_state, user_state = SqliteSessionService._scoped_state(conn, app_name, user_id)
+        if app_delta:
+            app_state.update(app_delta)
+            conn.execute("INSERT OR REPLACE INTO app_states (app_name, state) VALUES (?, ?)", (app_name, _dumps(app_state)))
+        if user_delta:
+            user_state.update(user_delta)
+            conn.execute(
+                "INSERT OR REPLACE INTO user_states (app_name, user_id, state) VALUES (?, ?, ?)",
+                (app_name, user_id, _dumps(user_state))
+            )
+
+    def _create(self, key: SessionKey, state: Optional[dict]) -> Session:
+        app_name, user_id, session_id = key
+        app_delta, user_delta, session_state = _split_state(state)
+        now = time.time()
+        with self._transaction() as conn:
+            exists = conn.execute(
+                "SELECT 1 FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key
+            ).fetchone()
+            if exists:
+                raise AlreadyExistsError(f"Session with id {session_id} already exists.")
+            self._update_scoped_state(conn, app_name, user_id, app_delta, user_delta)
+            conn.execute(
+                "INSERT INTO sessions (app_name, user_id, id, state, create_time, update_time) VALUES (?, ?, ?, ?, ?, ?)",
+                key + (_dumps(session_state), now, now)
+            )
+            app_state, user_state = self._scoped_state(conn, app_name, user_id)
+        return Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=_merge_state(session_state, app_state, user_state),
+            last_update_time=now
+        )
+
+    def _insert_if_missing(self, key: SessionKey) -> bool:
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO sessions (app_name, user_id, id, state, create_time, update_time) "
+                "VALUES (?, ?, ?, '{}', ?, ?)",
+                key + (now, now)
+            )
+            return cursor.rowcount == 1
+
+    def _load(
+        self,
+        key: SessionKey,
+        after_seq: Optional[int],
+        limit: Optional[int] = None,
+        after_timestamp: Optional[float] = None
+    ) -> Optional[Tuple[dict, float, List[Tuple[int, Event]]]]:
+        """
+        Read a session's merged state and update time plus the events asked for:
+        none if `after_seq` is None, else those after `after_seq`, optionally
+        only the newest `limit` and only from `after_timestamp` on.
+        """
+        app_name, user_id, _ = key
+        with self._transaction("DEFERRED") as conn:
+            row = conn.execute(
+                "SELECT state, update_time FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key
+            ).fetchone()
+            if row is None:
+                return None
+            app_state, user_state = self._scoped_state(conn, app_name, user_id)
+            rows = []
+            if after_seq is not None:
+                rows = conn.execute(
+                    "SELECT seq, data FROM events WHERE app_name = ? AND user_id = ? AND session_id = ? "
+                    "AND seq > ? AND timestamp >= ? ORDER BY seq DESC LIMIT ?",
+                    key + (after_seq, after_timestamp if after_timestamp is not None else float("-inf"),
+                           limit if limit is not None else -1)
+                ).fetchall()
+        events = [(seq, Event.model_validate_json(data)) for seq, data in reversed(rows)]
+        return _merge_state(json.loads(row[0]), app_state, user_state), row[1], events
+
+    def _store_event(self, session: Session, event: Event, loaded_at: float):
+        key = (session.app_name, session.user_id, session.id)
+        app_delta, user_delta, session_delta = _split_state(event.actions.state_delta if event.actions else None)
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT state, update_time FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key
+            ).fetchone()
+            if row is None:
+                raise SessionNotFoundError(f"Session {session.id} not found.")
+            if row[1] > loaded_at:
+                raise StaleSessionError(f"Session {session.id} was updated by another worker.")
+            state = json.loads(row[0])
+            state.update(session_delta)
+            self._update_scoped_state(conn, session.app_name, session.user_id, app_delta, user_delta)
+            conn.execute(
+                "UPDATE sessions SET state = ?, update_time = ? WHERE app_name = ? AND user_id = ? AND id = ?",
+                (_dumps(state), event.timestamp) + key
+            )
+            conn.execute(
+                "INSERT INTO events (app_name, user_id, session_id, timestamp, data) VALUES (?, ?, ?, ?, ?)",
+                key + (event.timestamp, event.model_dump_json(exclude_none=True))
+            )
+
+    def _list(self, app_name: str, user_id: Optional[str]) -> List[Session]:
+        with self._transaction("DEFERRED") as conn:
+            query = "SELECT user_id, id, state, update_time FROM sessions WHERE app_name = ?"
+            params: tuple = (app_name,)
+            if user_id is not None:
+                query += " AND user_id = ?"
+                params += (user_id,)
+            rows = conn.execute(query + " ORDER BY update_time, user_id, id", params).fetchall()
+            scoped = {uid: self._scoped_state(conn, app_name, uid) for uid in {r[0] for r in rows}}
+        return [
+            Session(
+                app_name=app_name,
+                user_id=uid,
+                id=sid,
+                state=_merge_state(json.loads(state), *scoped[uid]),
+                last_update_time=update_time
+            )
+            for uid, sid, state, update_time in rows
+        ]
+
+    def _delete(self, key: SessionKey):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?", key)
+            conn.execute("DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key)
+
+    def _user_state(self, app_name: str, user_id: str) -> dict:
+        with self._transaction("DEFERRED") as conn:
+            return self._scoped_state(conn, app_name, user_id)[1]
+
+    def _summary(self) -> dict:
+        with self._transaction("DEFERRED") as conn:
+            count, oldest_update, oldest_create = conn.execute(
+                "SELECT count(*), min(update_time), min(create_time) FROM sessions"
+            ).fetchone()
+            size = conn.execute("SELECT coalesce(sum(length(data)), 0) FROM events").fetchone()[0]
+        now = time.time()
+        return {
+            "sessions": count,
+            "bytes": size,
+            "oldest_idle_seconds": round(now - oldest_update, 3) if count else 0.0,
+            "oldest_age_seconds": round(now - oldest_create, 3) if count else 0.0,
+        }
+
+    @staticmethod
+    def _key(app_name: str, user_id: str, session_id: str) -> SessionKey:
+        return (app_name, user_id, session_id.strip() if session_id else session_id)
+
+    def _cache_put(self, key: SessionKey, last_seq: int, events: List[Event]):
+        self._cache[key] = (last_seq, events)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_sessions:
+            self._cache.popitem(last=False)
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session_id = (session_id.strip() if session_id else None) or uuid.uuid4().hex
+        return await run_storage(self._create, (app_name, user_id, session_id), state)
+
+    async def _get_or_create(self, key: SessionKey) -> bool:
+        return await run_storage(self._insert_if_missing, key)
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        key = self._key(app_name, user_id, session_id)
+        limit = config.num_recent_events if config else None
+        after_timestamp = config.after_timestamp if config else None
+        cached = self._cache.get(key)
+
+        if limit == 0:
+            loaded = await run_storage(self._load, key, None)
+            events = []
+        elif cached is None and (limit is not None or after_timestamp is not None):
+            # A filtered read of an unknown session: fetch just that window, don't cache it
+            loaded = await run_storage(self._load, key, 0, limit, after_timestamp)
+            events = [event for _, event in loaded[2]] if loaded else []
+        else:
+            last_seq, events = cached if cached is not None else (0, [])
+            self._stats["cache_hits" if cached is not None else "cache_misses"] += 1
+            loaded = await run_storage(self._load, key, last_seq)
+            if loaded and loaded[2]:
+                events = events + [event for _, event in loaded[2]]
+                last_seq = loaded[2][-1][0]
+            if loaded:
+                self._cache_put(key, last_seq, events)
+            if after_timestamp is not None:
+                events = [event for event in events if event.timestamp >= after_timestamp]
+            if limit is not None:
+                events = events[-limit:]
+
+        if loaded is None:
+            self._cache.pop(key, None)
+            return None
+        self._stats["events_loaded"] += len(loaded[2])
+        state, update_time, _ = loaded
+        return Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=key[2],
+            state=state,
+            events=list(events),
+            last_update_time=update_time
+        )
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        return ListSessionsResponse(sessions=await run_storage(self._list, app_name, user_id))
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        key = self._key(app_name, user_id, session_id)
+        self._cache.pop(key, None)
+        self._forget(key)
+        await run_storage(self._delete, key)
+
+    async def get_user_state(self, *, app_name: str, user_id: str) -> Dict[str, Any]:
+        return await run_storage(self._user_state, app_name, user_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        loaded_at = session.last_update_time
+        event = await super().append_event(session=session, event=event)
+        await run_storage(self._store_event, session, event, loaded_at)
+        session.last_update_time = event.timestamp
+        return event
+
+    async def summary(self) -> dict:
+        """Session count, stored event bytes, age of the oldest sessions and cache counters"""
+        summary = await run_storage(self._summary)
+        summary.update(self._stats, cached_sessions=len(self._cache), cache_sessions=self.cache_sessions)
+        summary["get_or_create"] = self.get_or_create_stats()
+        return summary
@@ -0,0 +1,137 @@
+"""
+Admission control for chat turns.
+
+Each worker runs at most `max_active` agent turns at once. Requests beyond
+that wait in a queue of at most `max_queue` entries for up to `queue_timeout`
+seconds. When the queue is full, or the wait runs out, the request is refused
+with ChatSaturated, which the endpoint turns into 429 with a Retry-After
+estimated from recent turn durations.
+
+Turns for the same session id additionally run one at a time, in arrival
+order: a double-submitted message waits for the previous turn instead of
+interleaving with it on the same session. A turn waiting for its session
+does not hold a global slot.
+"""
+import asyncio, math, os, time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+class ChatSaturated(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Chat is saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class ChatLease:
+    """An admitted turn's global slot and session turn; release exactly once"""
+
+    def __init__(self, admission: "ChatAdmission", session_id: str):
+        self._admission = admission
+        self.session_id = session_id
+        self.started = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._admission._release(self)
+
+class ChatAdmission:
+    def __init__(self, max_active: int = 8, max_queue: int = 32, queue_timeout: float = 30.0):
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        # session_id -> [lock, turns holding or waiting for it]; asyncio.Lock wakes waiters in FIFO order
+        self._sessions: Dict[str, List] = {}
+        self._run_seconds = 0.0  # moving average of turn duration, for Retry-After
+        self._waits: Deque[float] = deque(maxlen=1024)
+        self._stats = {"admitted": 0, "rejected": 0, "timed_out": 0, "max_waiting": 0}
+
+    @classmethod
+    def from_env(cls) -> "ChatAdmission":
+        """Build the limits from CHAT_MAX_ACTIVE, CHAT_MAX_QUEUE and CHAT_QUEUE_TIMEOUT_SECONDS"""
+        return cls(
+            max_active=int(os.getenv("CHAT_MAX_ACTIVE", "8")),
+            max_queue=int(os.getenv("CHAT_MAX_QUEUE", "32")),
+            queue_timeout=float(os.getenv("CHAT_QUEUE_TIMEOUT_SECONDS", "30"))
+        )
+
+    def retry_after(self) -> int:
+        """Seconds until a queued turn would likely start"""
+        turns_ahead = self.waiting / max(self.max_active, 1) + 1
+        return max(1, math.ceil(self._run_seconds * turns_ahead))
+
+    async def _acquire(self, lock: asyncio.Lock):
+        await lock.acquire()
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            lock.release()
+            raise
+
+    async def acquire(self, session_id: str) -> ChatLease:
+        """Wait for the session's turn and a global slot, or raise ChatSaturated"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_active)
+        entry = self._sessions.get(session_id)
+        # Counted synchronously: waiters reach the semaphore only once their task runs
+        in_flight = self.active + self.waiting
+        must_wait = in_flight >= self.max_active or entry is not None
+        if must_wait and in_flight >= self.max_active + self.max_queue:
+            self._stats["rejected"] += 1
+            raise ChatSaturated(self.retry_after())
+
+        if entry is None:
+            entry = self._sessions[session_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        self.waiting += 1
+        self._stats["max_waiting"] = max(self._stats["max_waiting"], self.waiting)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._acquire(entry[0]), self.queue_timeout if self.queue_timeout > 0 else None)
+        except asyncio.TimeoutError:
+            self._stats["timed_out"] += 1
+            self._leave_session(session_id)
+            raise ChatSaturated(self.retry_after())
+        except BaseException:
+            self._leave_session(session_id)
+            raise
+        finally:
+            self.waiting -= 1
+        self._waits.append(time.monotonic() - started)
+        self.active += 1
+        self._stats["admitted"] += 1
+        return ChatLease(self, session_id)
+
+    def _leave_session(self, session_id: str):
+        entry = self._sessions[session_id]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self._sessions[session_id]
+
+    def _release(self, lease: ChatLease):
+        self.active -= 1
+        elapsed = time.monotonic() - lease.started
+        self._run_seconds = elapsed if not self._run_seconds else 0.8 * self._run_seconds + 0.2 * elapsed
+        self._slots.release()
+        self._sessions[lease.session_id][0].release()
+        self._leave_session(lease.session_id)
+
+    def stats(self) -> dict:
+        """Active turns, queue depth, wait times and rejection counts"""
+        waits = sorted(self._waits)
+        percentile = lambda p: round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 3) if waits else 0.0
+        return dict(
+            self._stats,
+            active=self.active,
+            waiting=self.waiting,
+            sessions=len(self._sessions),
+            max_active=self.max_active,
+            max_queue=self.max_queue,
+            wait_ms_p50=percentile(0.5),
+            wait_ms_p99=percentile(0.99),
+            wait_ms_max=round(waits[-1] * 1000, 3) if waits else 0.0,
+            avg_turn_seconds=round(self._run_seconds, 3),
+        )
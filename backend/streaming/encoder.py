@@ -0,0 +1,79 @@
+"""
+SSE frame encoder for the chat stream.
+
+Produces exactly the bytes of `f"data: {ChatMessage(...).model_dump_json()}\n\n"`
+without building a pydantic model per chunk: each frame type has a precomputed
+byte template, strings go through the C JSON string escaper, and a batch of
+frames is assembled in one reusable buffer.
+"""
+import json
+from json.encoder import encode_basestring
+from typing import Iterable
+
+from streaming.flush import Frame
+
+_CONTENT = b'data: {"type":"content","data":{"text":'
+_TRANSFER = b'data: {"type":"agent_transfer","data":{"agent":'
+_DONE = b'data: {"type":"done","data":{"message":'
+_ERROR = b'data: {"type":"error","data":{"message":'
+_MESSAGE = b',"message":'
+_DETAIL = b',"detail":'
+_END = b'}}\n\n'
+
+def _escape(value: str) -> bytes:
+    return encode_basestring(value).encode()
+
+def _encode_generic(frame: Frame) -> bytes:
+    """Any other frame shape, serialized the way pydantic would for JSON-native data"""
+    message = json.dumps({"type": frame.type, "data": frame.data}, ensure_ascii=False, separators=(",", ":"))
+    return b"data: " + message.encode() + b"\n\n"
+
+def _encode_frame(frame: Frame) -> bytes:
+    """Fill the template for the frame's type; templates apply only to the exact key layout"""
+    kind, data = frame
+    if kind == "content" and len(data) == 1:
+        text = data.get("text")
+        if type(text) is str:
+            return _CONTENT + _escape(text) + _END
+    elif kind == "agent_transfer" and len(data) == 2:
+        agent, message = data.get("agent"), data.get("message")
+        if type(agent) is str and type(message) is str and next(iter(data)) == "agent":
+            return _TRANSFER + _escape(agent) + _MESSAGE + _escape(message) + _END
+    elif kind == "done" and len(data) == 1:
+        message = data.get("message")
+        if type(message) is str:
+            encoded = _done_frames.get(message)
+            if encoded is None:
+                encoded = _done_frames.setdefault(message, _DONE + _escape(message) + _END)
+            return encoded
+    elif kind == "error":
+        message, detail = data.get("message"), data.get("detail")
+        if type(message) is str and next(iter(data)) == "message":
+            if len(data) == 1:
+                return _ERROR + _escape(message) + _END
+            if len(data) == 2 and type(detail) is str:
+                return _ERROR + _escape(message) + _DETAIL + _escape(detail) + _END
+    return _encode_generic(frame)
+
+# "done" messages are constants; cache their encoded frames (bounded by distinct texts)
+_done_frames = {}
+
+class SSEEncoder:
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def encode(self, frame: Frame) -> bytes:
+        """Encode a single frame"""
+        return _encode_frame(frame)
+
+    def encode_event(self, frame: Frame, event_id: int) -> bytes:
+        """Encode a single frame as an SSE event with an `id:` line"""
+        return b"id: %d\n" % event_id + _encode_frame(frame)
+
+    def encode_batch(self, frames: Iterable[Frame]) -> bytes:
+        """Encode frames back to back into one chunk using the reusable buffer"""
+        buffer = self._buffer
+        buffer.clear()
+        for frame in frames:
+            buffer += _encode_frame(frame)
+        return bytes(buffer)
@@ -0,0 +1,92 @@
+"""
+Event classification for the chat streaming hot path.
+
+`run_agent` used to probe every event with a chain of `hasattr` checks to find
+the acting agent and then walk the content parts twice. `classify_event`
+resolves which attribute carries the agent name once per event type, caches
+that strategy, and extracts agent, text and function-call details in a single
+pass over the parts. Results are identical to the previous probing logic for
+event types whose instances share the same attributes, as ADK events do.
+"""
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+class EventInfo(NamedTuple):
+    agent: Optional[str]  # Agent named by the event, or the target of transfer_to_agent
+    text: Optional[str]  # Concatenated text parts, None if there are none
+    function_calls: Tuple[Tuple[str, Any], ...]  # (name, args) for each function call part
+    function_responses: Tuple[str, ...]  # name of each function response part
+
+_NO_CALLS: Tuple = ()
+
+def _scan_parts(content: Any) -> Tuple[Optional[str], Optional[str], tuple, tuple]:
+    """Single pass over content.parts: (transfer target, text, calls, responses)"""
+    parts = getattr(content, 'parts', None) if content else None
+    if not parts:
+        return None, None, _NO_CALLS, _NO_CALLS
+    transfer_to = None
+    transfer_seen = False
+    texts = []
+    calls = []
+    responses = []
+    for part in parts:
+        text = getattr(part, 'text', None)
+        if text:
+            texts.append(text)
+        call = getattr(part, 'function_call', None)
+        if call:
+            name = getattr(call, 'name', None)
+            args = getattr(call, 'args', None)
+            calls.append((name, args))
+            if not transfer_seen and name == 'transfer_to_agent' and isinstance(args, dict):
+                transfer_to = args.get('agent_name')
+                transfer_seen = True
+        response = getattr(part, 'function_response', None)
+        if response:
+            responses.append(getattr(response, 'name', None))
+    return (
+        transfer_to,
+        ''.join(texts) if texts else None,
+        tuple(calls) if calls else _NO_CALLS,
+        tuple(responses) if responses else _NO_CALLS,
+    )
+
+_MISSING = object()
+
+def _from_attribute(name: str) -> Callable[[Any, Optional[str]], Optional[str]]:
+    def extract(event: Any, transfer_to: Optional[str]) -> Optional[str]:
+        value = getattr(event, name, _MISSING)
+        if value is _MISSING:
+            return _resolve_strategy(event)(event, transfer_to)
+        return value
+    return extract
+
+def _from_metadata(event: Any, transfer_to: Optional[str]) -> Optional[str]:
+    metadata = getattr(event, 'metadata', _MISSING)
+    if metadata is _MISSING:
+        return _resolve_strategy(event)(event, transfer_to)
+    if isinstance(metadata, dict):
+        return metadata.get('agent_name') or metadata.get('agent')
+    return transfer_to
+
+def _from_transfer(event: Any, transfer_to: Optional[str]) -> Optional[str]:
+    return transfer_to
+
+_strategies: Dict[type, Callable[[Any, Optional[str]], Optional[str]]] = {}
+
+def _resolve_strategy(event: Any) -> Callable[[Any, Optional[str]], Optional[str]]:
+    """Pick where this event type carries its agent name, in the original probe order"""
+    if hasattr(event, 'agent'):
+        return _from_attribute('agent')
+    if hasattr(event, 'agent_name'):
+        return _from_attribute('agent_name')
+    if hasattr(event, 'metadata'):
+        return _from_metadata
+    return _from_transfer
+
+def classify_event(event: Any) -> EventInfo:
+    """Extract agent name, text and function-call info from an agent event"""
+    strategy = _strategies.get(type(event))
+    if strategy is None:
+        strategy = _strategies[type(event)] = _resolve_strategy(event)
+    transfer_to, text, calls, responses = _scan_parts(getattr(event, 'content', None))
+    return EventInfo(strategy(event, transfer_to), text, calls, responses)
@@ -0,0 +1,119 @@
+"""
+Flush policies for the chat SSE writer.
+
+The agent run produces frames into a queue on its own task while the response
+side drains it. Whenever the client falls behind, every frame already waiting
+is written in a single chunk and adjacent `content` frames are merged into one,
+so a slow reader gets fewer, larger frames instead of back-pressuring the run.
+Chat turns drain the policy into their replay buffer (see streaming/turns.py),
+so there the merging follows the agent's bursts rather than the client's pace.
+
+Policies:
+- immediate: send as soon as a frame is available, merging only what is queued
+- window:    after the first frame, keep collecting for `window` seconds
+- size:      collect until `max_bytes` of text is pending or `window` elapses
+"""
+import asyncio, os, time
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, List, NamedTuple, Optional, Union
+
+class Frame(NamedTuple):
+    type: str  # "agent_transfer", "content", "done", "error"
+    data: dict
+
+_END = object()
+
+def merge_content(frames: List[Frame]) -> List[Frame]:
+    """Merge runs of adjacent content frames into single frames"""
+    merged: List[Frame] = []
+    for frame in frames:
+        if frame.type == "content" and merged and merged[-1].type == "content":
+            merged[-1] = Frame("content", {"text": merged[-1].data["text"] + frame.data["text"]})
+        else:
+            merged.append(frame)
+    return merged
+
+class FlushPolicy:
+    def __init__(self, mode: str = "immediate", window: float = 0.02, max_bytes: int = 512, max_queue: int = 1024):
+        if mode not in ("immediate", "window", "size"):
+            raise ValueError(f"Unknown SSE flush policy: {mode}")
+        self.mode = mode
+        self.window = window
+        self.max_bytes = max_bytes
+        self.max_queue = max_queue
+
+    @classmethod
+    def from_env(cls) -> "FlushPolicy":
+        """Build the policy from SSE_FLUSH_POLICY, SSE_FLUSH_WINDOW_MS and SSE_FLUSH_MAX_BYTES"""
+        return cls(
+            mode=os.getenv("SSE_FLUSH_POLICY", "immediate"),
+            window=float(os.getenv("SSE_FLUSH_WINDOW_MS", "20")) / 1000,
+            max_bytes=int(os.getenv("SSE_FLUSH_MAX_BYTES", "512"))
+        )
+
+    async def _collect(self, queue: asyncio.Queue, batch: List[object]):
+        """Append further queued items to batch according to the policy"""
+        deadline = time.monotonic() + self.window
+        pending = sum(len(f.data.get("text", "")) for f in batch if isinstance(f, Frame))
+        while True:
+            while not queue.empty():
+                item = queue.get_nowait()
+                batch.append(item)
+                if not isinstance(item, Frame):
+                    return
+                pending += len(item.data.get("text", ""))
+            if self.mode == "immediate" or (self.mode == "size" and pending >= self.max_bytes):
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                item = await asyncio.wait_for(queue.get(), remaining)
+            except asyncio.TimeoutError:
+                return
+            batch.append(item)
+            if not isinstance(item, Frame):
+                return
+            pending += len(item.data.get("text", ""))
+
+    async def stream(
+        self,
+        frames: AsyncIterator[Frame],
+        encode: Callable[[List[Frame]], Union[str, bytes]]
+    ) -> AsyncIterator[Union[str, bytes]]:
+        """Drive `frames` on a producer task and yield one encoded chunk per batch"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue)
+
+        async def produce():
+            try:
+                # Closing `frames` on cancellation unwinds the agent run instead of leaving it suspended
+                async with aclosing(frames):
+                    async for frame in frames:
+                        await queue.put(frame)
+            except Exception as e:
+                await queue.put(e)
+                return
+            await queue.put(_END)
+
+        producer = asyncio.create_task(produce())
+        try:
+            finished = False
+            while not finished:
+                batch = [await queue.get()]
+                if isinstance(batch[0], Frame):
+                    await self._collect(queue, batch)
+                tail: Optional[object] = None
+                if not isinstance(batch[-1], Frame):
+                    tail = batch.pop()
+                    finished = True
+                if batch:
+                    yield encode(merge_content(batch))
+                if isinstance(tail, Exception):
+                    raise tail
+        finally:
+            if not producer.done():
+                producer.cancel()
+                try:
+                    await producer
+                except asyncio.CancelledError:
+                    pass
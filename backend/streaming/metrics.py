@@ -0,0 +1,197 @@
+"""
+Local Prometheus metrics for chat turns.
+
+Counters, gauges and fixed-bucket histograms are kept in process and
+rendered in the Prometheus text exposition format by `/api/metrics`, so
+latency and agent behaviour can be scraped (e.g. for autoscaling) without a
+network exporter. Recording is a dict update or a bisect per observation.
+
+`ChatMetrics.start_turn()` returns a TurnMetrics that `stream_agent_response`
+feeds with every frame and tool call:
+- time to first token: turn start to the first content frame
+- turn duration: turn start to the end of the turn, whatever its outcome
+- inter-chunk gap: between consecutive content frames
+- transfers by source and destination agent, tool calls by tool, active
+  streams and errors by exception type
+
+Function names and transfer targets come from the model, so tool calls and
+transfers are only labelled with the tool and agent names ChatMetrics was
+given; any other name is counted as "other" to keep the number of series
+bounded.
+
+`render_stats` exports the stats dicts other components already keep
+(admission, turns, session store, caches) as gauges and counters.
+"""
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from streaming.flush import Frame
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        if not self._values and not self.labelnames:
+            return [f"{self.name} 0"]
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(v)}" for labels, v in sorted(self._values.items())]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot: above the largest bucket
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self._counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self) -> List[str]:
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), self._counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{_number(bound)}"}} {cumulative}')
+        lines.append(f"{self.name}_sum {_number(self.sum)}")
+        lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+def render(metrics: Iterable) -> str:
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+def render_stats(prefix: str, stats: dict, counters: Iterable[str] = ()) -> str:
+    """
+    Numeric values of a stats dict as `<prefix>_<key>` gauges; keys listed in
+    `counters` become `<prefix>_<key>_total` counters. A nested dict of numbers
+    becomes one metric with a `kind` label, other nested dicts are flattened
+    under `<prefix>_<key>`. Non-numeric values are skipped.
+    """
+    counters = set(counters)
+    lines = []
+    for key, value in stats.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            if value and all(isinstance(v, (int, float)) for v in value.values()):
+                kind = "counter" if key in counters else "gauge"
+                name += "_total" if kind == "counter" else ""
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f'{name}{{kind="{_escape(str(k))}"}} {_number(v)}' for k, v in value.items())
+            else:
+                lines.append(render_stats(name, value, counters).rstrip("\n"))
+        elif isinstance(value, (int, float)):
+            kind = "counter" if key in counters else "gauge"
+            name += "_total" if kind == "counter" else ""
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {_number(int(value) if isinstance(value, bool) else value)}")
+    return "\n".join(line for line in lines if line) + "\n"
+
+class TurnMetrics:
+    """Timing and agent behaviour of one chat turn"""
+    __slots__ = ("_metrics", "started", "agent", "_last_content", "_finished")
+
+    def __init__(self, metrics: "ChatMetrics", agent: str):
+        self._metrics = metrics
+        self.started = time.perf_counter()
+        self.agent = metrics.agent_label(agent)
+        self._last_content: Optional[float] = None
+        self._finished = False
+        metrics.active_streams.inc()
+
+    def frame(self, frame: Frame):
+        if frame.type == "content":
+            now = time.perf_counter()
+            if self._last_content is None:
+                self._metrics.time_to_first_token.observe(now - self.started)
+            else:
+                self._metrics.inter_chunk_gap.observe(now - self._last_content)
+            self._last_content = now
+        elif frame.type == "agent_transfer":
+            destination = self._metrics.agent_label(frame.data["agent"])
+            self._metrics.transfers.inc(self.agent, destination)
+            self.agent = destination
+
+    def tool_call(self, name: str):
+        self._metrics.tool_calls.inc(name if name in self._metrics.tool_names else "other")
+
+    def error(self, error: BaseException):
+        self._metrics.errors.inc(type(error).__name__)
+
+    def finish(self):
+        if not self._finished:
+            self._finished = True
+            self._metrics.turn_duration.observe(time.perf_counter() - self.started)
+            self._metrics.active_streams.dec()
+
+class ChatMetrics:
+    def __init__(self, tool_names: Iterable[str] = (), agent_names: Iterable[str] = ()):
+        self.tool_names = frozenset(tool_names)
+        self.agent_names = frozenset(agent_names)
+        self.time_to_first_token = Histogram(
+            "chat_time_to_first_token_seconds", "Time from the start of a chat turn to its first content frame",
+            (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60))
+        self.turn_duration = Histogram(
+            "chat_turn_duration_seconds", "Duration of chat turns, whatever their outcome",
+            (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300))
+        self.inter_chunk_gap = Histogram(
+            "chat_inter_chunk_gap_seconds", "Time between consecutive content frames of a chat turn",
+            (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10))
+        self.transfers = Counter("chat_agent_transfers_total", "Agent transfers by source and destination agent (other for unknown names)", ("source", "destination"))
+        self.tool_calls = Counter("chat_tool_calls_total", "Tool calls made by the agents, by registered tool (other for unknown names)", ("tool",))
+        self.active_streams = Gauge("chat_active_streams", "Chat turns currently streaming")
+        self.errors = Counter("chat_errors_total", "Chat turns that failed, by exception type", ("type",))
+
+    def agent_label(self, name: str) -> str:
+        return name if name in self.agent_names else "other"
+
+    def start_turn(self, agent: str) -> TurnMetrics:
+        return TurnMetrics(self, agent)
+
+    def metrics(self) -> list:
+        return [self.time_to_first_token, self.turn_duration, self.inter_chunk_gap,
+                self.transfers, self.tool_calls, self.active_streams, self.errors]
+
+    def render(self) -> str:
+        return render(self.metrics())
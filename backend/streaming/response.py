@@ -0,0 +1,58 @@
+"""
+Streaming response for chat turns.
+
+Starlette only watches for client disconnects on servers reporting ASGI
+spec < 2.4 (uvicorn reports 2.3). For later versions it relies on the next
+write failing, and a server may silently drop writes to a closed connection,
+so the response behind a closed tab would keep going until the turn ended.
+
+ChatStreamingResponse always listens for `http.disconnect` alongside the
+stream. When the client goes away it cancels the stream and closes the body
+iterator, which detaches the client from its turn (see streaming/turns.py);
+a turn nobody follows any more is cancelled after its resume grace period.
+
+RequestStreamingResponse is for bodies that are produced while the request
+body is still being read: it never listens for `http.disconnect`, which
+would consume the request's own body messages, and leaves disconnect
+detection to the request stream (ClientDisconnect) and failed writes.
+"""
+import asyncio
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+class ChatStreamingResponse(StreamingResponse):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.client_aborted = False
+
+    async def __call__(self, scope, receive, send):
+        stream = asyncio.ensure_future(self.stream_response(send))
+        disconnect = asyncio.ensure_future(self.listen_for_disconnect(receive))
+        try:
+            await asyncio.wait((stream, disconnect), return_when=asyncio.FIRST_COMPLETED)
+            if not stream.done():
+                self.client_aborted = True
+                stream.cancel()
+            try:
+                await stream
+            except asyncio.CancelledError:
+                if not self.client_aborted:
+                    raise
+            except OSError:
+                self.client_aborted = True
+                raise ClientDisconnect()
+        finally:
+            stream.cancel()
+            disconnect.cancel()
+            # A stream cancelled while writing leaves the generator suspended at a yield
+            await self.body_iterator.aclose()
+
+class RequestStreamingResponse(StreamingResponse):
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        finally:
+            await self.body_iterator.aclose()
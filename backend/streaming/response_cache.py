@@ -0,0 +1,111 @@
+"""
+Opt-in cache of first-turn chat responses.
+
+Many chats open with the same message ("hi", "what can you do", "plan a trip
+to Paris"). A first turn runs against an empty session, so its response does
+not depend on anything but the message; with CHAT_RESPONSE_CACHE=1 it is
+cached under the normalized message text, the answering agent and the turn
+index. A later chat opening with the same message replays the cached frames
+instead of calling the model, and the cached ADK events are appended to its
+session, so the history (including agent transfers) is the same as if the
+agent had run.
+
+Only turns that completed are stored, and only short messages are eligible.
+The cache lives in the worker's memory.
+"""
+import os, re, time
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple
+
+from google.adk.events.event import Event
+from google.genai import types
+
+from streaming.flush import Frame, merge_content
+
+class CachedTurn(NamedTuple):
+    frames: Tuple[Frame, ...]
+    events: Tuple[Event, ...]
+    stored_at: float
+
+def normalize_message(message: str) -> str:
+    """Casefold, collapse whitespace and drop surrounding punctuation"""
+    return re.sub(r"^[\W_]+|[\W_]+$", "", " ".join(message.casefold().split()))
+
+class FirstTurnCache:
+    def __init__(self, enabled: bool = False, max_entries: int = 256, ttl: float = 3600.0, max_message_chars: int = 200):
+        self.enabled = enabled and max_entries > 0
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_message_chars = max_message_chars
+        self._entries: "OrderedDict[Tuple, CachedTurn]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "expirations": 0, "evictions": 0}
+
+    @classmethod
+    def from_env(cls) -> "FirstTurnCache":
+        """Build from CHAT_RESPONSE_CACHE, CHAT_RESPONSE_CACHE_SIZE, CHAT_RESPONSE_CACHE_TTL_SECONDS and CHAT_RESPONSE_CACHE_MAX_CHARS"""
+        return cls(
+            enabled=os.getenv("CHAT_RESPONSE_CACHE", "0").lower() in ("1", "true", "yes"),
+            max_entries=int(os.getenv("CHAT_RESPONSE_CACHE_SIZE", "256")),
+            ttl=float(os.getenv("CHAT_RESPONSE_CACHE_TTL_SECONDS", "3600")),
+            max_message_chars=int(os.getenv("CHAT_RESPONSE_CACHE_MAX_CHARS", "200"))
+        )
+
+    def key(self, message: str, agent: str, turn: int) -> Optional[Tuple]:
+        """Cache key for a turn, or None if the turn is not eligible"""
+        if not self.enabled or turn != 0 or len(message) > self.max_message_chars:
+            return None
+        text = normalize_message(message)
+        return (text, agent, turn) if text else None
+
+    def get(self, key: Tuple) -> Optional[CachedTurn]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+        if time.monotonic() - entry.stored_at >= self.ttl:
+            del self._entries[key]
+            self._stats["expirations"] += 1
+            self._stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        return entry
+
+    def put(self, key: Tuple, frames: List[Frame], events: List[Event]):
+        """Store a completed turn's frames and the non-partial events the runner appended"""
+        self._entries.pop(key, None)
+        self._entries[key] = CachedTurn(
+            tuple(merge_content(frames)),
+            tuple(event.model_copy(deep=True) for event in events if not event.partial),
+            time.monotonic()
+        )
+        self._stats["stores"] += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    async def record(self, session_service, session, message: str, cached: CachedTurn):
+        """Append the user message and copies of the cached events to the session, as the runner would"""
+        invocation_id = "e-" + Event.new_id()
+        await session_service.append_event(session, Event(
+            author="user",
+            invocation_id=invocation_id,
+            content=types.Content(role="user", parts=[types.Part(text=message)])
+        ))
+        for event in cached.events:
+            await session_service.append_event(session, event.model_copy(deep=True, update={
+                "id": Event.new_id(),
+                "invocation_id": invocation_id,
+                "timestamp": time.time(),
+            }))
+
+    def stats(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return dict(
+            self._stats,
+            enabled=self.enabled,
+            entries=len(self._entries),
+            max_entries=self.max_entries,
+            ttl_seconds=self.ttl,
+            hit_rate=round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+        )
@@ -0,0 +1,223 @@
+"""
+Resumable chat turns.
+
+An agent turn runs on its own task instead of inside the response that
+started it. Every frame it produces gets an SSE `id:` that keeps increasing
+across the turns of a session and is kept in a bounded per-session ring
+buffer. Responses follow the buffer:
+- the POST that started the turn streams it from its first frame
+- a reconnecting client sends `Last-Event-ID` to the resume endpoint and
+  receives only the frames after that id, then follows the live turn
+
+When the last client of a running turn disconnects, the turn keeps running
+for `grace` seconds so the client can resume; if nobody reattaches in time
+the run is cancelled, as for any other abandoned stream. Buffers live in the
+worker's memory, so resuming requires reaching the worker that ran the turn.
+
+Pacing: the turn drains the flush policy into the buffer as fast as the
+agent produces frames, so a slow client no longer holds back the run and
+the policy's merging of queued content frames only depends on the agent's
+own bursts. A follower that falls behind receives every buffered frame it
+missed in one write. If it falls further behind than the buffer holds, its
+stream ends with an error frame whose `code` is `replay_gap` instead of
+silently stopping; the conversation has to be reloaded.
+"""
+import asyncio, os
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Callable, Deque, List, Optional, Tuple
+
+from streaming.admission import ChatLease
+from streaming.flush import Frame, FlushPolicy
+
+class ReplayGap(Exception):
+    """The requested frames have already been dropped from the buffer"""
+
+GAP_MESSAGE = "Missed frames are no longer available"
+
+class FrameBuffer:
+    """Ring of the most recent (id, encoded frame) pairs of one session"""
+
+    def __init__(self, size: int):
+        self._frames: Deque[Tuple[int, bytes]] = deque(maxlen=size)
+        self.last_id = 0
+
+    def append(self, data: bytes) -> int:
+        """Store the encoded frame with id `last_id + 1`"""
+        self.last_id += 1
+        self._frames.append((self.last_id, data))
+        return self.last_id
+
+    def since(self, last_id: int) -> List[bytes]:
+        """Frames after `last_id`; raises ReplayGap if some of them were dropped"""
+        if last_id >= self.last_id:
+            return []
+        if not self._frames or self._frames[0][0] > last_id + 1:
+            raise ReplayGap(f"Frames after {last_id} are no longer buffered")
+        skip = len(self._frames) - (self.last_id - last_id)
+        return [data for i, (_, data) in enumerate(self._frames) if i >= skip]
+
+class ChatTurn:
+    def __init__(
+        self,
+        session_id: str,
+        buffer: FrameBuffer,
+        lease: ChatLease,
+        grace: float,
+        encode: Callable[[Frame, int], bytes],
+        stats: Optional[dict] = None
+    ):
+        self.session_id = session_id
+        self.buffer = buffer
+        self.first_id = buffer.last_id + 1
+        self.lease = lease
+        self.grace = grace
+        self.encode = encode
+        self._stats = stats if stats is not None else {"gaps": 0}
+        self.done = False
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()  # replaced after every wake-up
+        self._clients = 0
+        self._abandon: Optional[asyncio.TimerHandle] = None
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def run(self, frames: AsyncIterator[Frame], policy: FlushPolicy):
+        """Drive the turn, buffering each frame with its id and waking followers per batch"""
+        def store(batch: List[Frame]) -> bytes:
+            for frame in batch:
+                self.buffer.append(self.encode(frame, self.buffer.last_id + 1))
+            self._notify()
+            return b""
+
+        try:
+            async for _ in policy.stream(frames, store):
+                pass
+        finally:
+            self.done = True
+            if self._abandon is not None:
+                self._abandon.cancel()
+            self.lease.release()
+            self._notify()
+
+    def attach(self):
+        self._clients += 1
+        if self._abandon is not None:
+            self._abandon.cancel()
+            self._abandon = None
+
+    def detach(self):
+        self._clients -= 1
+        if self._clients == 0 and not self.done:
+            # Keep running for a reconnect, then give up on the run
+            self._abandon = asyncio.get_running_loop().call_later(self.grace, self.task.cancel)
+
+    async def follow(self, last_id: int) -> AsyncIterator[bytes]:
+        """Frames after `last_id`, then live frames until the turn ends"""
+        self.attach()
+        try:
+            while True:
+                changed = self._changed
+                try:
+                    frames = self.buffer.since(last_id)
+                except ReplayGap:
+                    # Fell further behind than the buffer holds. The error keeps the client's
+                    # last id, so the stream's final Last-Event-ID still names what it received
+                    self._stats["gaps"] += 1
+                    yield self.encode(Frame("error", {"message": GAP_MESSAGE, "code": "replay_gap"}), last_id)
+                    return
+                if frames:
+                    last_id += len(frames)
+                    yield b"".join(frames)
+                elif self.done:
+                    return
+                else:
+                    await changed.wait()
+        finally:
+            self.detach()
+
+class ChatTurns:
+    def __init__(self, buffer_frames: int = 256, max_sessions: int = 1000, grace: float = 10.0):
+        self.buffer_frames = buffer_frames
+        self.max_sessions = max_sessions
+        self.grace = grace
+        self._buffers: "OrderedDict[str, FrameBuffer]" = OrderedDict()
+        self._turns: dict = {}
+        self._stats = {"turns": 0, "resumes": 0, "frames_replayed": 0, "gaps": 0}
+
+    @classmethod
+    def from_env(cls) -> "ChatTurns":
+        """Build from SSE_REPLAY_FRAMES, SSE_REPLAY_SESSIONS and SSE_RESUME_GRACE_SECONDS"""
+        return cls(
+            buffer_frames=int(os.getenv("SSE_REPLAY_FRAMES", "256")),
+            max_sessions=int(os.getenv("SSE_REPLAY_SESSIONS", "1000")),
+            grace=float(os.getenv("SSE_RESUME_GRACE_SECONDS", "10"))
+        )
+
+    def _buffer(self, session_id: str) -> FrameBuffer:
+        buffer = self._buffers.get(session_id)
+        if buffer is None:
+            buffer = self._buffers[session_id] = FrameBuffer(self.buffer_frames)
+        self._buffers.move_to_end(session_id)
+        while len(self._buffers) > self.max_sessions:
+            # A running turn keeps its own reference; only resuming it becomes impossible
+            self._buffers.popitem(last=False)
+        return buffer
+
+    def start(
+        self,
+        session_id: str,
+        frames: AsyncIterator[Frame],
+        lease: ChatLease,
+        policy: FlushPolicy,
+        encode: Callable[[Frame, int], bytes]
+    ) -> ChatTurn:
+        """Run a turn in the background; the admission lease is released when it ends"""
+        turn = ChatTurn(session_id, self._buffer(session_id), lease, self.grace, encode, self._stats)
+        self._turns[session_id] = turn
+        self._stats["turns"] += 1
+
+        async def run():
+            try:
+                await turn.run(frames, policy)
+            finally:
+                if self._turns.get(session_id) is turn:
+                    del self._turns[session_id]
+
+        turn.task = asyncio.create_task(run())
+        return turn
+
+    def resume(self, session_id: str, last_id: int) -> Optional[AsyncIterator[bytes]]:
+        """
+        Frames of the session after `last_id`, following the running turn if
+        there is one; None if the session has no buffered frames. Raises
+        ReplayGap if frames after `last_id` were already dropped.
+        """
+        buffer = self._buffers.get(session_id)
+        if buffer is None:
+            return None
+        try:
+            missed = buffer.since(last_id)
+        except ReplayGap:
+            self._stats["gaps"] += 1
+            raise
+        self._stats["resumes"] += 1
+        self._stats["frames_replayed"] += len(missed)
+        turn = self._turns.get(session_id)
+        if turn is not None:
+            return turn.follow(last_id)
+
+        async def replay():
+            if missed:
+                yield b"".join(missed)
+        return replay()
+
+    def stats(self) -> dict:
+        return dict(
+            self._stats,
+            running=len(self._turns),
+            buffered_sessions=len(self._buffers),
+            buffer_frames=self.buffer_frames,
+            grace_seconds=self.grace,
+        )
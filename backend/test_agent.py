@@ -1,5 +1,9 @@
 """
 Test script to debug agent responses with tool calls
+
+Runs against the live model by default. With network access, MODEL_BACKEND=record
+also saves the model responses (see travel_planner/model_backend.py); afterwards
+MODEL_BACKEND=replay runs the same conversation offline.
 """
 import os
 import sys
@@ -1,4 +1,3 @@
-import os
 from datetime import datetime
 from dotenv import load_dotenv
 # from ddtrace.llmobs import LLMObs
@@ -10,6 +9,7 @@ from .tools.marcus import search_accommodations, get_accommodation_reviews
 from .tools.sofia import search_attractions, create_daily_itinerary, check_operating_hours
 from .tools.luca import get_restaurant_recommendations
 from .tools.alex import calculate_trip_cost, check_budget_status, suggest_cost_savings, allocate_budget
+from .model_backend import agent_model, agent_tool_callbacks
 
 # Load environment variables from .env file
 load_dotenv()
@@ -29,8 +29,9 @@ def get_current_date_context():
 
 # Flight search sub-agent
 flight_search_agent = Agent(
-    model=os.getenv("GOOGLE_GENAI_MODEL"),
+    model=agent_model('Jenny'),
     name='Jenny',
+    **agent_tool_callbacks('Jenny'),
     description='Agent specialized in searching and booking flights.',
     instruction='''You are Jenny, the Flight Search Agent. Your responsibilities include searching for flights based on user preferences, comparing prices, and assisting with booking.
 
@@ -68,8 +69,9 @@ IMPORTANT NOTES:
 
 # Accommodation sub-agent
 accomadation_agent = Agent(
-    model=os.getenv("GOOGLE_GENAI_MODEL"),
+    model=agent_model('Marcus'),
     name='Marcus',
+    **agent_tool_callbacks('Marcus'),
     description='Agent specialized in searching and booking accommodations.',
     instruction='''You are Marcus, the Accommodation Agent. Your responsibilities include searching for accommodations based on user preferences, comparing prices, and assisting with booking.
 
@@ -108,8 +110,9 @@ IMPORTANT NOTES:
 
 # Itinerary sub-agent
 itinerary_agent = Agent(
-    model=os.getenv("GOOGLE_GENAI_MODEL"),
+    model=agent_model('Sofia'),
     name='Sofia',
+    **agent_tool_callbacks('Sofia'),
     description='Agent specialized in creating travel itineraries and finding attractions.',
     instruction='''You are Sofia, the Itinerary and Attractions Agent. Your responsibilities include creating detailed travel itineraries based on user preferences, finding attractions, activities, and sightseeing opportunities.
 
@@ -153,8 +156,9 @@ IMPORTANT NOTES:
 
 # Restaurant specialist sub-agent
 restaurant_agent = Agent(
-    model=os.getenv("GOOGLE_GENAI_MODEL"),
+    model=agent_model('Luca'),
     name='Luca',
+    **agent_tool_callbacks('Luca'),
     description='Agent specialized in restaurant recommendations and dining reservations.',
     instruction='''You are Luca, the Restaurant Specialist Agent. Your sole responsibility is helping users find the perfect dining experiences. You provide restaurant recommendations based on cuisine preferences, price ranges, and meal types.
 
@@ -202,8 +206,9 @@ IMPORTANT NOTES:
 
 # Budget management sub-agent
 budget_manager_agent = Agent(
-    model=os.getenv("GOOGLE_GENAI_MODEL"),
+    model=agent_model('Alex'),
     name='Alex',
+    **agent_tool_callbacks('Alex'),
     description='Agent specialized in managing travel budgets.',
     instruction='''You are Alex, the Budget Manager Agent. Your responsibilities include helping users manage their travel budgets by providing cost estimates, tracking expenses, and suggesting cost-saving options. Use available tools to gather pricing information and assist users in staying within their budgets.
 
@@ -230,8 +235,9 @@ You should respond: "I've calculated your trip costs! **Trip Cost Breakdown**\nT
 
 # Main agent
 root_agent = Agent(
-    model=os.getenv("GOOGLE_GENAI_MODEL"),
+    model=agent_model('Sam'),
     name='Sam',
+    **agent_tool_callbacks('Sam'),
     description='A helpful travel planning assistant that coordinates with specialized agents.',
     instruction=f'''You are Sam, the main Travel Planner assistant. Your role is to understand user needs and coordinate with specialized agents:
 - Jenny for flight searches and bookings
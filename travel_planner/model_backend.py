@@ -0,0 +1,339 @@
+"""
+Model backend for the travel planner agents
+Selects the model each agent uses from MODEL_BACKEND:
+- live (default): the GOOGLE_GENAI_MODEL model, as before
+- record: the live model, with every model response and every tool response
+  appended to MODEL_RECORDING_PATH
+- replay: model and tool responses come from MODEL_RECORDING_PATH without any
+  network access, so the whole agent pipeline (transfers, tool calls,
+  streaming) runs offline and deterministically, e.g. for benchmarks and
+  regression runs on CI
+
+Tool responses are recorded because the tools are not deterministic (the
+normalize_* helpers fall back to random picks); replayed tool calls return
+the recorded response without running the tool.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Tuple
+
+from google.adk.models.base_llm import BaseLlm, LlmCapabilities
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+
+DEFAULT_RECORDING_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recordings', 'model_calls.jsonl')
+
+# Text is replayed in word-sized tokens
+TOKEN_PATTERN = re.compile(r'\s*\S+\s*|\s+')
+
+# Tools that act on the agent tree rather than return data always run
+UNRECORDED_TOOLS = {'transfer_to_agent'}
+
+
+class ReplayMiss(LookupError):
+    """The recording has no response for a model request or tool call"""
+
+
+def request_key(agent_name: str, llm_request: LlmRequest) -> str:
+    """
+    Fingerprint of a model request: the calling agent and the conversation it sends.
+
+    Function call ids and function response payloads are left out: ids are random
+    per run, and tool results are replayed from the recording by their own key.
+    """
+    turns = []
+    for content in llm_request.contents:
+        parts = []
+        for part in content.parts or []:
+            if part.text is not None:
+                parts.append(['text', part.text])
+            elif part.function_call is not None:
+                parts.append(['call', part.function_call.name, part.function_call.args or {}])
+            elif part.function_response is not None:
+                parts.append(['response', part.function_response.name])
+        turns.append([content.role, parts])
+    payload = json.dumps([agent_name, turns], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def tool_key(agent_name: str, tool_name: str, args: Dict[str, Any]) -> str:
+    """Fingerprint of a tool call: the calling agent, the tool and its arguments"""
+    payload = json.dumps([agent_name, tool_name, args], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _last_user_text(llm_request: LlmRequest) -> str:
+    for content in reversed(llm_request.contents):
+        if content.role == 'user':
+            for part in content.parts or []:
+                if part.text:
+                    return part.text
+    return ''
+
+
+class ModelRecording:
+    """
+    Model and tool responses stored as JSON lines, one line per model call or
+    tool call (tool lines carry a `tool` field).
+
+    Replaying a key returns its recorded calls in order; once they are used up
+    the last one is repeated.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._calls: Optional[Dict[str, List[List[dict]]]] = None
+        self._tools: Dict[str, List[Any]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._tool_cursor: Dict[str, int] = {}
+
+    def _load(self) -> Dict[str, List[List[dict]]]:
+        if self._calls is None:
+            calls: Dict[str, List[List[dict]]] = {}
+            tools: Dict[str, List[Any]] = {}
+            if os.path.exists(self.path):
+                with open(self.path, encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            record = json.loads(line)
+                            if 'tool' in record:
+                                tools.setdefault(record['key'], []).append(record['response'])
+                            else:
+                                calls.setdefault(record['key'], []).append(record['responses'])
+            self._calls, self._tools = calls, tools
+        return self._calls
+
+    @staticmethod
+    def _take(recorded: Dict[str, list], cursor: Dict[str, int], key: str) -> Optional[Any]:
+        entries = recorded.get(key)
+        if not entries:
+            return None
+        index = cursor.get(key, 0)
+        cursor[key] = index + 1
+        return entries[min(index, len(entries) - 1)]
+
+    def next(self, key: str) -> Optional[List[LlmResponse]]:
+        with self._lock:
+            responses = self._take(self._load(), self._cursor, key)
+            return [LlmResponse.model_validate(r) for r in responses] if responses is not None else None
+
+    def next_tool(self, key: str) -> Optional[Any]:
+        with self._lock:
+            self._load()
+            return self._take(self._tools, self._tool_cursor, key)
+
+    def rewind(self):
+        """Start replaying every key from its first recorded call again"""
+        with self._lock:
+            self._cursor.clear()
+            self._tool_cursor.clear()
+
+    def _write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+            if self._calls is not None:
+                if 'tool' in record:
+                    self._tools.setdefault(record['key'], []).append(json.loads(line)['response'])
+                else:
+                    self._calls.setdefault(record['key'], []).append(record['responses'])
+
+    def append(self, key: str, agent_name: str, request_text: str, responses: List[LlmResponse]):
+        self._write({
+            'key': key,
+            'agent': agent_name,
+            'request': request_text[:200],
+            'responses': [r.model_dump(mode='json', exclude_none=True) for r in responses]
+        })
+
+    def append_tool(self, key: str, agent_name: str, tool_name: str, args: Dict[str, Any], response: Any):
+        self._write({
+            'key': key,
+            'agent': agent_name,
+            'tool': tool_name,
+            'args': args,
+            'response': response
+        })
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = self._load()
+            return {
+                'path': self.path,
+                'keys': len(calls),
+                'calls': sum(len(v) for v in calls.values()),
+                'replayed': sum(self._cursor.values()),
+                'tool_keys': len(self._tools),
+                'tool_calls': sum(len(v) for v in self._tools.values()),
+                'tools_replayed': sum(self._tool_cursor.values())
+            }
+
+
+class RecordingLlm(BaseLlm):
+    """Calls the wrapped live model and records each of its final responses"""
+
+    agent_name: str
+    inner: BaseLlm
+    recording: Any
+
+    @property
+    def capabilities(self) -> LlmCapabilities:
+        return self.inner.capabilities
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        # Fingerprint before the wrapped model adds anything to the request
+        key = request_key(self.agent_name, llm_request)
+        request_text = _last_user_text(llm_request)
+        final: List[LlmResponse] = []
+        async for response in self.inner.generate_content_async(llm_request, stream):
+            if response.partial:
+                yield response
+            else:
+                final.append(response)
+        # Written before the final responses are yielded: the caller may stop iterating after them
+        await asyncio.to_thread(self.recording.append, key, self.agent_name, request_text, final)
+        for response in final:
+            yield response
+
+
+class ReplayLlm(BaseLlm):
+    """
+    Answers model requests from a recording.
+
+    Each response is delayed by `first_token_delay` plus `token_delay` per
+    token (words of text, one per function call). With stream=True the text
+    arrives as partial responses, one per token, before the final response.
+    """
+
+    agent_name: str
+    recording: Any
+    token_delay: float = 0.0
+    first_token_delay: float = 0.0
+
+    @property
+    def capabilities(self) -> LlmCapabilities:
+        return LlmCapabilities(output_schema_and_tools=True)
+
+    def _tokens(self, response: LlmResponse) -> List[Tuple[str, Optional[types.Part]]]:
+        tokens = []
+        for part in (response.content.parts if response.content else None) or []:
+            if part.text and not part.thought:
+                tokens.extend((token, None) for token in TOKEN_PATTERN.findall(part.text))
+            else:
+                tokens.append(('', part))
+        return tokens
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        responses = self.recording.next(request_key(self.agent_name, llm_request))
+        if responses is None:
+            raise ReplayMiss(
+                f"No recorded model response for {self.agent_name} after {_last_user_text(llm_request)[:80]!r}; "
+                f"record it with MODEL_BACKEND=record"
+            )
+        if self.first_token_delay:
+            await asyncio.sleep(self.first_token_delay)
+        for response in responses:
+            tokens = self._tokens(response)
+            if stream:
+                for text, part in tokens:
+                    if self.token_delay:
+                        await asyncio.sleep(self.token_delay)
+                    yield LlmResponse(
+                        content=types.Content(role='model', parts=[part or types.Part(text=text)]),
+                        partial=True
+                    )
+            elif self.token_delay:
+                await asyncio.sleep(self.token_delay * len(tokens))
+            yield response
+
+
+def record_tool_callback(agent_name: str, recording: ModelRecording) -> Callable:
+    """after_tool_callback that appends each tool response to the recording"""
+    async def record_tool(tool, args: Dict[str, Any], tool_context, tool_response):
+        if tool.name not in UNRECORDED_TOOLS:
+            key = tool_key(agent_name, tool.name, args)
+            await asyncio.to_thread(recording.append_tool, key, agent_name, tool.name, args, tool_response)
+        return None
+    return record_tool
+
+
+def replay_tool_callback(agent_name: str, recording: ModelRecording) -> Callable:
+    """before_tool_callback that answers tool calls from the recording instead of running the tool"""
+    def replay_tool(tool, args: Dict[str, Any], tool_context):
+        if tool.name in UNRECORDED_TOOLS:
+            return None
+        response = recording.next_tool(tool_key(agent_name, tool.name, args))
+        if response is None:
+            raise ReplayMiss(
+                f"No recorded response for {agent_name}'s {tool.name}({args}); record it with MODEL_BACKEND=record"
+            )
+        return response
+    return replay_tool
+
+
+_recordings: Dict[str, ModelRecording] = {}
+
+
+def get_recording(path: Optional[str] = None) -> ModelRecording:
+    """The shared recording for a path (default MODEL_RECORDING_PATH)"""
+    path = os.path.abspath(path or os.getenv('MODEL_RECORDING_PATH') or DEFAULT_RECORDING_PATH)
+    if path not in _recordings:
+        _recordings[path] = ModelRecording(path)
+    return _recordings[path]
+
+
+def agent_model(agent_name: str):
+    """
+    The model for an agent, selected by MODEL_BACKEND.
+
+    Returns the GOOGLE_GENAI_MODEL name for live (ADK resolves it as usual), or
+    a model that records or replays through the shared recording. Replay
+    latency comes from MODEL_REPLAY_TOKEN_MS and MODEL_REPLAY_FIRST_TOKEN_MS.
+    """
+    backend = os.getenv('MODEL_BACKEND', 'live').lower()
+    model_name = os.getenv('GOOGLE_GENAI_MODEL')
+    if backend == 'live':
+        return model_name
+    if backend == 'record':
+        return RecordingLlm(
+            model=model_name,
+            agent_name=agent_name,
+            inner=LLMRegistry.new_llm(model_name),
+            recording=get_recording()
+        )
+    if backend == 'replay':
+        return ReplayLlm(
+            model=model_name or 'replay',
+            agent_name=agent_name,
+            recording=get_recording(),
+            token_delay=float(os.getenv('MODEL_REPLAY_TOKEN_MS', '0')) / 1000,
+            first_token_delay=float(os.getenv('MODEL_REPLAY_FIRST_TOKEN_MS', '0')) / 1000
+        )
+    raise ValueError(f"Unknown MODEL_BACKEND: {backend} (expected live, record or replay)")
+
+
+def agent_tool_callbacks(agent_name: str) -> Dict[str, Callable]:
+    """
+    Agent keyword arguments that record or replay tool responses, selected by
+    MODEL_BACKEND like agent_model(); none for live.
+    """
+    backend = os.getenv('MODEL_BACKEND', 'live').lower()
+    if backend == 'record':
+        return {'after_tool_callback': record_tool_callback(agent_name, get_recording())}
+    if backend == 'replay':
+        return {'before_tool_callback': replay_tool_callback(agent_name, get_recording())}
+    return {}